@@ -0,0 +1,132 @@
+# Benchmark simulačního enginu: latence jednotlivých funkcí a propustnost Monte Carla (simulací/s).
+#   python bench.py                      # změří a vypíše
+#   python bench.py --save               # uloží baseline do bench_baseline.json
+#   python bench.py --check              # porovná s baseline, při regresi nad prahem skončí kódem 1 (bez baseline kódem 2)
+#   python bench.py --profile            # navíc rozpad času po fázích (engine.profiler)
+# Seedy i vstupy jsou pevné; každý benchmark běží po zahřátí několikrát a bere se nejlepší čas (nejméně zatížený šumem).
+# Fáze v --profile se vnořují (např. "MC: úložiště" obsahuje "dávka: *").
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import engine
+from engine import APP_VERSION, team_powers_db, results_db, groups_def, day_index, sched
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+THRESHOLD = 0.25   # povolené zhoršení proti baseline (0.25 = o 25 % pomalejší)
+
+def timed(fn, repeat, setup=None):
+    # setup() před každým opakováním se do času nepočítá
+    times = []
+    for _ in range(repeat):
+        if setup: setup()
+        t = time.perf_counter(); fn(); times.append(time.perf_counter() - t)
+    return min(times)
+
+def latency(name, fn, calls, repeat=5):
+    fn()   # zahřátí (tabulky výsledků, zmrazený stav)
+    per_call = timed(lambda: [fn() for _ in range(calls)], repeat) / calls
+    return {"name": name, "unit": "µs/volání", "value": per_call * 1e6, "higher_is_better": False}
+
+def throughput(name, fn, n_sims, repeat=3, setup=None):
+    return {"name": name, "unit": "simulací/s", "value": n_sims / timed(fn, repeat, setup), "higher_is_better": True}
+
+_tmp_dirs = []
+
+def cold_cache():
+    # Každé opakování mc_stats začíná s prázdnou .sim_cache (počítá se i zápis úložiště a indexu)
+    engine.CACHE_DIR = tempfile.mkdtemp(prefix="bench-cache-"); _tmp_dirs.append(engine.CACHE_DIR)
+
+def patched_cache(n, db):
+    # Studená cache jen s bankou a indexem pro db bez posledního výsledku: měří se jejich oprava (_store_patch)
+    def setup():
+        cold_cache(); engine.load_outcome_index(n, team_powers_db, db, APP_VERSION)
+    return setup
+
+def run_benchmarks(quick=False):
+    pw, db, v = team_powers_db, results_db, APP_VERSION
+    tourney = engine.run_tourney(1, pw, db, v)
+    group_a = [m for m in tourney if m["stg"] == "GA"]
+    seeds = iter(range(10**6, 10**8))
+    d, t1, t2, gn = sched[-1]
+    res = [
+        latency("sim_match", lambda: engine.sim_match(t1, t2, next(seeds), pw, {}, f"G{gn}", engine.date_mapping[d], {}), 2000),
+        latency("get_team_form", lambda: engine.get_team_form("Česko", tourney, day_index["Úterý 26. května"]), 2000),
+        latency("get_iihf_rankings", lambda: engine.get_iihf_rankings(groups_def["A"], group_a), 1000),
+        latency("run_tourney (= run_tourney_cached bez cache)", lambda: engine.run_tourney(next(seeds), pw, db, v), 50),
+        latency("group_outlook (skupina A)", lambda: engine.group_outlook("A", db), 3, repeat=3),
+        throughput("run_tourney_batch 20k", lambda: engine.run_tourney_batch(np.arange(1, 20001), pw, db, v), 20000),
+    ]
+    for n in [1000, 10000] + ([] if quick else [100000]):
+        res.append(throughput(f"mc_stats {n // 1000}k (studená cache)", lambda: engine.mc_stats(n, pw, db, v), n, setup=cold_cache))
+        res.append(latency(f"mc_stats {n // 1000}k (z disk cache)", lambda: engine.mc_stats(n, pw, db, v), 5))
+    res.append(throughput("mc_stats 10k s přesným play-off (studená cache)", lambda: engine.mc_stats(10000, pw, db, v, playoffs="exact"), 10000, setup=cold_cache))
+    n = 10000 if quick else 100000
+    played = [k for _, a, b, g in sched for k in [(a, b, f"G{g}"), (b, a, f"G{g}")] if k in db]
+    res.append(throughput(f"load_outcome_index {n // 1000}k (studená cache)", lambda: engine.load_outcome_index(n, pw, db, v), n, setup=cold_cache))
+    res.append(throughput(f"load_outcome_index {n // 1000}k po novém výsledku", lambda: engine.load_outcome_index(n, pw, db, v), n,
+                          setup=patched_cache(n, {k: x for k, x in db.items() if k != played[-1]})))
+    res.append(throughput("whatif_sweep 5 scénářů × 10k", lambda: engine.whatif_sweep(engine.whatif_grid(("Česko", "OFF"), [-10, -5, 0, 5, 10]), 10000, db, v), 6 * 10000))
+    return res
+
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(), "cpus": os.cpu_count(),
+            "engine": engine.MC_ENGINE, "chunk": engine.MC_CHUNK, "model_rev": engine.MODEL_REV}
+
+def compare(results, baseline, threshold):
+    base = {r["name"]: r for r in baseline["results"]}; failed = []
+    for r in results:
+        b = base.get(r["name"])
+        if b is None: continue
+        ratio = b["value"] / r["value"] if r["higher_is_better"] else r["value"] / b["value"]   # >1 = pomalejší
+        r["vs_baseline"] = ratio
+        if ratio > 1 + (threshold if threshold is not None else b.get("threshold", THRESHOLD)): failed.append(r["name"])
+    return failed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark simulačního enginu MS 2026")
+    ap.add_argument("--quick", action="store_true", help="bez mc_stats 100k")
+    ap.add_argument("--save", action="store_true", help=f"uložit jako baseline ({os.path.basename(BASELINE)})")
+    ap.add_argument("--check", action="store_true", help="porovnat s baseline a při regresi skončit kódem 1")
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--threshold", type=float, help=f"povolené zhoršení, jinak podle baseline (výchozí {THRESHOLD})")
+    ap.add_argument("--profile", action="store_true", help="vypsat čas po fázích enginu")
+    a = ap.parse_args(argv)
+
+    if a.check and not os.path.exists(a.baseline):
+        print(f"Baseline {a.baseline} neexistuje: nejdřív ji na tomhle stroji ulož (python bench.py --save)", file=sys.stderr)
+        return 2
+    prof = engine.Profiler(); engine.use_profiler(prof if a.profile else None); orig_cache = engine.CACHE_DIR
+    try: results = run_benchmarks(a.quick)
+    finally:
+        engine.CACHE_DIR = orig_cache
+        for d in _tmp_dirs: shutil.rmtree(d, ignore_errors=True)
+    failed = []
+    if a.check:
+        with open(a.baseline, encoding="utf-8") as f: failed = compare(results, json.load(f), a.threshold)
+
+    for r in results:
+        vs = f"  ({(r['vs_baseline'] - 1) * 100:+.0f} % proti baseline)" if "vs_baseline" in r else ""
+        print(f"{r['name']:<45} {r['value']:>14,.1f} {r['unit']}{vs}".replace(",", " "))
+    if a.profile:
+        phases, counters = prof.report()
+        print("\nFáze (součet přes všechny benchmarky):")
+        for p in phases: print(f"  {p['Fáze']:<30} {p['Volání']:>8} × {p['Průměr [ms]']:>10.3f} ms = {p['Celkem [ms]']:>10.1f} ms")
+        for k, c in counters.items(): print(f"  {k:<30} {c:>12,}".replace(",", " "))
+    if a.save:
+        for r in results: r.pop("vs_baseline", None); r["threshold"] = a.threshold if a.threshold is not None else THRESHOLD
+        with open(a.baseline, "w", encoding="utf-8") as f:
+            json.dump({"created": time.strftime("%Y-%m-%d %H:%M:%S"), "environment": environment(), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"Baseline uložena do {a.baseline}")
+    if failed:
+        print("\nREGRESE proti baseline: " + ", ".join(failed), file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1684 @@
+# Simulační engine MS 2026 bez Streamlitu: import nemá vedlejší efekty (žádné UI, pandas se načítá až při
+# sestavení tabulek), takže ho lze použít v app.py, v dávkových úlohách (simulate.py), notebooku i ve workerech.
+import numpy as np
+import os
+import math
+import itertools
+import hashlib
+import uuid
+import pickle
+import threading
+import contextvars
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# --- 1. KONFIGURACE ---
+APP_VERSION = "11.3-AUTOMATED-PURE"
+MC_ENGINE = "batch"   # "batch" = NumPy dávky (turnaje × zápasy), "serial" = původní smyčka přes run_tourney
+MC_CHUNK = 20000      # počet turnajů v jedné NumPy dávce
+MC_WORKERS = 1        # >1 = seedy 1..n se rozdělí na souvislé bloky a počítají se v process poolu (adaptivně po dávkách MC_CHUNK)
+MC_SIMS = 10000       # počet simulací pro Prediktor a Hledač zázraků
+MC_CI_TARGET = 0.005  # adaptivní Prediktor: cílová polovina 95% intervalu (0.005 = ±0.5 p. b.)
+MC_MAX_SIMS = 1000000 # adaptivní Prediktor: strop počtu simulací
+MC_RARE_REL = 0.25    # u vybraných vzácných výsledků: polovina intervalu nejvýš 25 % odhadu
+MC_RARE_ABS = 0.001   # ... nebo horní mez 95% intervalu pod 0.1 % (jinak by výsledek s nulovým odhadem běžel do stropu)
+MC_PLAYOFFS = "exact" # Prediktor: "exact" = play-off přesně z rozdělení výsledků skupin, "sample" = vzorkované
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sim_cache")
+CACHE_MAX_BYTES = 512 * 2**20   # strop pro .sim_cache, nejdéle nepoužité soubory se mažou jako první
+STORE_LINEAGE = 8     # kolik posledních stavů db si pamatuje open_sim_store pro opravu banky po novém výsledku
+STORE_PATCH_REDO = 0.35   # ... a nad tímto podílem turnajů, které se musí zahrát znovu celé, je nový běh levnější
+JOB_WORKERS = 2       # vlákna pro úlohy na pozadí (JobQueue), sdílená všemi sezeními aplikace
+JOB_KEEP = 32         # kolik hotových úloh si JobQueue pamatuje
+WHATIF_SIMS = 10000   # simulací na scénář ve whatif_sweep (všechny scénáře sdílí stejné seedy)
+
+# --- 2. DATA (Aktualizováno po 6. hracím dni) ---
+team_powers_db = {
+    # Skupina A
+    "USA": {"OFF": 89, "DEF": 84, "SKILL": 96},            
+    "Finsko": {"OFF": 93, "DEF": 95, "SKILL": 89},         
+    "Švýcarsko": {"OFF": 99, "DEF": 95, "SKILL": 92},      
+    "Německo": {"OFF": 81, "DEF": 86, "SKILL": 84},        
+    "Lotyšsko": {"OFF": 67, "DEF": 77, "SKILL": 72},       
+    "Rakousko": {"OFF": 65, "DEF": 58, "SKILL": 60},       
+    "Velká Británie": {"OFF": 38, "DEF": 35, "SKILL": 35}, 
+    "Maďarsko": {"OFF": 49, "DEF": 47, "SKILL": 40},       
+    
+    # Skupina B
+    "Kanada": {"OFF": 99, "DEF": 89, "SKILL": 99},         
+    "Švédsko": {"OFF": 92, "DEF": 90, "SKILL": 90},        
+    "Česko": {"OFF": 89, "DEF": 84, "SKILL": 94},          
+    "Slovensko": {"OFF": 87, "DEF": 81, "SKILL": 88},      
+    "Dánsko": {"OFF": 65, "DEF": 67, "SKILL": 65},         
+    "Norsko": {"OFF": 69, "DEF": 68, "SKILL": 62},         
+    "Slovinsko": {"OFF": 55, "DEF": 50, "SKILL": 55},      
+    "Itálie": {"OFF": 45, "DEF": 55, "SKILL": 45}          
+}
+
+groups_def = {
+    "A": ["Finsko", "Německo", "Švýcarsko", "USA", "Rakousko", "Velká Británie", "Maďarsko", "Lotyšsko"],
+    "B": ["Švédsko", "Kanada", "Dánsko", "Česko", "Slovensko", "Norsko", "Itálie", "Slovinsko"]
+}
+
+# REÁLNÉ VÝSLEDKY - Zapsán 1. - 6. den
+results_db = {
+    ("Finsko", "Německo", "GA"): (3, 1, "REG"),
+    ("Švédsko", "Kanada", "GB"): (3, 5, "REG"),
+    ("Švýcarsko", "USA", "GA"): (3, 1, "REG"),
+    ("Dánsko", "Česko", "GB"): (1, 4, "REG"),
+    ("Rakousko", "Velká Británie", "GA"): (5, 2, "REG"),
+    ("Slovensko", "Norsko", "GB"): (2, 1, "REG"),
+    ("Finsko", "Maďarsko", "GA"): (4, 1, "REG"),
+    ("Kanada", "Itálie", "GB"): (6, 0, "REG"),
+    ("Švýcarsko", "Lotyšsko", "GA"): (4, 2, "REG"),
+    ("Slovinsko", "Česko", "GB"): (3, 2, "PP"),
+    ("USA", "Velká Británie", "GA"): (5, 1, "REG"),
+    ("Itálie", "Slovensko", "GB"): (1, 4, "REG"),
+    ("Rakousko", "Maďarsko", "GA"): (4, 2, "REG"),
+    ("Švédsko", "Dánsko", "GB"): (6, 2, "REG"),
+    ("Německo", "Lotyšsko", "GA"): (0, 2, "REG"),
+    ("Norsko", "Slovinsko", "GB"): (4, 0, "REG"),
+    ("Finsko", "USA", "GA"): (6, 2, "REG"),
+    ("Kanada", "Dánsko", "GB"): (5, 1, "REG"),
+    ("Švýcarsko", "Německo", "GA"): (6, 1, "REG"),
+    ("Česko", "Švédsko", "GB"): (4, 3, "REG"),
+    ("Lotyšsko", "Rakousko", "GA"): (1, 3, "REG"),
+    ("Itálie", "Norsko", "GB"): (0, 4, "REG"),
+    ("Maďarsko", "Velká Británie", "GA"): (5, 0, "REG"), 
+    ("Slovinsko", "Slovensko", "GB"): (4, 5, "SN"),
+    ("Švýcarsko", "Rakousko", "GA"): (9, 0, "REG"),
+    ("Česko", "Itálie", "GB"): (3, 1, "REG"),
+    ("USA", "Německo", "GA"): (4, 3, "SN"),
+    ("Švédsko", "Slovinsko", "GB"): (6, 0, "REG"),
+}
+
+date_mapping = {
+    "Pátek 15. května": 1, "Sobota 16. května": 2, "Neděle 17. května": 3,
+    "Pondělí 18. května": 4, "Úterý 19. května": 5, "Středa 20. května": 6,
+    "Čtvrtek 21. května": 7, "Pátek 22. května": 8, "Sobota 23. května": 9,
+    "Neděle 24. května": 10, "Pondělí 25. května": 11, "Úterý 26. května": 12,
+    "Čtvrtek 28. května (ČF)": 14, "Sobota 30. května (SF)": 16, "Neděle 31. května (Medaile)": 17
+}
+dates_list = list(date_mapping.keys())
+
+sched = [
+    ("Pátek 15. května", "Finsko", "Německo", "A"), ("Pátek 15. května", "Švédsko", "Kanada", "B"),
+    ("Pátek 15. května", "Švýcarsko", "USA", "A"), ("Pátek 15. května", "Dánsko", "Česko", "B"),
+    ("Sobota 16. května", "Rakousko", "Velká Británie", "A"), ("Sobota 16. května", "Slovensko", "Norsko", "B"),
+    ("Sobota 16. května", "Finsko", "Maďarsko", "A"), ("Sobota 16. května", "Kanada", "Itálie", "B"),
+    ("Sobota 16. května", "Švýcarsko", "Lotyšsko", "A"), ("Sobota 16. května", "Slovinsko", "Česko", "B"),
+    ("Neděle 17. května", "USA", "Velká Británie", "A"), ("Neděle 17. května", "Itálie", "Slovensko", "B"),
+    ("Neděle 17. května", "Rakousko", "Maďarsko", "A"), ("Neděle 17. května", "Švédsko", "Dánsko", "B"),
+    ("Neděle 17. května", "Německo", "Lotyšsko", "A"), ("Neděle 17. května", "Norsko", "Slovinsko", "B"),
+    ("Pondělí 18. května", "Finsko", "USA", "A"), ("Pondělí 18. května", "Kanada", "Dánsko", "B"),
+    ("Pondělí 18. května", "Švýcarsko", "Německo", "A"), ("Pondělí 18. května", "Česko", "Švédsko", "B"),
+    ("Úterý 19. května", "Lotyšsko", "Rakousko", "A"), ("Úterý 19. května", "Itálie", "Norsko", "B"),
+    ("Úterý 19. května", "Maďarsko", "Velká Británie", "A"), ("Úterý 19. května", "Slovinsko", "Slovensko", "B"),
+    ("Středa 20. května", "Švýcarsko", "Rakousko", "A"), ("Středa 20. května", "Česko", "Itálie", "B"),
+    ("Středa 20. května", "USA", "Německo", "A"), ("Středa 20. května", "Švédsko", "Slovinsko", "B"),
+    ("Čtvrtek 21. května", "Finsko", "Lotyšsko", "A"), ("Čtvrtek 21. května", "Norsko", "Kanada", "B"),
+    ("Čtvrtek 21. května", "Švýcarsko", "Velká Británie", "A"), ("Čtvrtek 21. května", "Dánsko", "Slovensko", "B"),
+    ("Pátek 22. května", "Maďarsko", "Německo", "A"), ("Pátek 22. května", "Kanada", "Slovinsko", "B"),
+    ("Pátek 22. května", "Finsko", "Velká Británie", "A"), ("Pátek 22. května", "Itálie", "Švédsko", "B"),
+    ("Sobota 23. května", "USA", "Lotyšsko", "A"), ("Sobota 23. května", "Dánsko", "Slovinsko", "B"),
+    ("Sobota 23. května", "Švýcarsko", "Maďarsko", "A"), ("Sobota 23. května", "Slovensko", "Česko", "B"),
+    ("Sobota 23. května", "Německo", "Rakousko", "A"), ("Sobota 23. května", "Švédsko", "Norsko", "B"),
+    ("Neděle 24. května", "Lotyšsko", "Velká Británie", "A"), ("Neděle 24. května", "Dánsko", "Itálie", "B"),
+    ("Neděle 24. května", "Finsko", "Rakousko", "A"), ("Neděle 24. května", "Kanada", "Slovensko", "B"),
+    ("Pondělí 25. května", "USA", "Maďarsko", "A"), ("Pondělí 25. května", "Česko", "Norsko", "B"),
+    ("Pondělí 25. května", "Německo", "Velká Británie", "A"), ("Pondělí 25. května", "Slovinsko", "Itálie", "B"),
+    ("Úterý 26. května", "Maďarsko", "Lotyšsko", "A"), ("Úterý 26. května", "Norsko", "Dánsko", "B"),
+    ("Úterý 26. května", "USA", "Rakousko", "A"), ("Úterý 26. května", "Slovensko", "Švédsko", "B"),
+    ("Úterý 26. května", "Švýcarsko", "Finsko", "A"), ("Úterý 26. května", "Česko", "Kanada", "B"),
+]
+qf_labels = ["ČF1 (16:15, Curych)", "ČF2 (16:15, Fribourg)", "ČF3 (20:15, Curych)", "ČF4 (20:15, Fribourg)"]
+sf_labels = ["SF1 (14:30, Curych)", "SF2 (18:30, Curych)"]
+
+# --- POMOCNÉ FUNKCE ---
+day_index = {d: i for i, d in enumerate(dates_list)}
+
+class FormTracker:
+    # Forma týmů průběžně: kruhový buffer posledních 3 výsledků + série, push() je O(1)
+    def __init__(self):
+        self.ring, self.count, self.streaks = {}, {}, {}
+
+    def push(self, m):
+        self._push(m["t1"], m["s1"] > m["s2"])
+        self._push(m["t2"], m["s2"] > m["s1"])
+
+    def _push(self, team, won):
+        n = self.count.get(team, 0)
+        self.ring.setdefault(team, [False, False, False])[n % 3] = won
+        self.count[team] = n + 1
+        s = self.streaks.get(team, 0)
+        if won: self.streaks[team] = min(s + 1, 3) if s > 0 else 1
+        else: self.streaks[team] = max(s - 1, -3) if s < 0 else -1
+
+    def streak(self, team):
+        return self.streaks.get(team, 0)
+
+    def form(self, team):
+        n = self.count.get(team, 0)
+        form_str = "".join("✅" if self.ring[team][i % 3] else "❌" for i in range(max(0, n - 3), n))
+        return form_str, self.streak(team)
+
+    def copy(self):
+        c = FormTracker()
+        c.ring = {t: r[:] for t, r in self.ring.items()}; c.count = dict(self.count); c.streaks = dict(self.streaks)
+        return c
+
+def form_tracker(matches, current_date_idx):
+    tracker = FormTracker()
+    for m in matches:
+        if day_index[m["d"]] < current_date_idx: tracker.push(m)
+    return tracker
+
+def get_team_form(team, matches, current_date_idx):
+    return form_tracker(matches, current_date_idx).form(team)
+
+class Profiler:
+    # Měření jednoho běhu: součty časů po fázích (lap) a čítače. Engine ho vidí jen po use_profiler(p)
+    # v kontextu volajícího (vlákno stránky, bench.py); jiná sezení do něj nepíšou a úloha JobQueue má vlastní
+    # (Job.profiler). Měří jen v tomto procesu, ne ve workerech poolu. report() jde volat i za běhu z jiného vlákna.
+    def __init__(self):
+        self.times, self.calls, self.counters = {}, {}, {}
+
+    def start(self):
+        return time.perf_counter()
+
+    def lap(self, name, t0):
+        # Připíše čas od t0 fázi `name` a vrátí začátek další fáze
+        t = time.perf_counter()
+        self.calls[name] = self.calls.get(name, 0) + 1; self.times[name] = self.times.get(name, 0.0) + t - t0
+        return t
+
+    def count(self, name, k=1):
+        self.counters[name] = self.counters.get(name, 0) + k
+
+    def report(self):
+        rows = [{"Fáze": k, "Volání": self.calls[k], "Celkem [ms]": v * 1000, "Průměr [ms]": v * 1000 / self.calls[k]} for k, v in list(self.times.items())]
+        return sorted(rows, key=lambda r: -r["Celkem [ms]"]), dict(self.counters)
+
+_active_profiler = contextvars.ContextVar("profiler", default=None)
+
+def use_profiler(p):
+    # Profiler pro aktuální kontext (vlákno/běh stránky), None = neměřit. Nová vlákna začínají bez profileru.
+    _active_profiler.set(p)
+
+class _CurrentProfiler:
+    # `profiler` v enginu: předává volání profileru aktivnímu v kontextu volajícího, bez něj stojí jedno ContextVar.get
+    def start(self):
+        p = _active_profiler.get()
+        return p.start() if p else 0.0
+
+    def lap(self, name, t0):
+        p = _active_profiler.get()
+        return p.lap(name, t0) if p else 0.0
+
+    def count(self, name, k=1):
+        p = _active_profiler.get()
+        if p: p.count(name, k)
+
+profiler = _CurrentProfiler()
+
+def _canon(obj):
+    if isinstance(obj, dict): return tuple(sorted((_canon(k), _canon(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple)): return tuple(_canon(x) for x in obj)
+    return obj
+
+def content_key(*parts):
+    return hashlib.sha256(repr(_canon(parts)).encode("utf-8")).hexdigest()[:32]
+
+# --- 4. LOGIKA PRO ANALYTICS ---
+team_list = groups_def["A"] + groups_def["B"]
+team_idx = {t: i for i, t in enumerate(team_list)}
+rt_codes = ["REG", "PP", "SN"]
+host_id = team_idx["Švýcarsko"]
+MODEL_REV = 2   # mění se s každou změnou vzorkování; je součástí klíčů diskové cache
+
+def _mix64(x):
+    x = x + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def counter_uniforms(match_seeds, n_draws=1):
+    # Čítačový generátor: číslo závisí jen na (match_seed, pořadí tahu), ne na velikosti dávky,
+    # takže turnaj se stejným seedem vyjde stejně v dávce 1M, samostatně i v sériovém enginu.
+    keys = _mix64(np.asarray(match_seeds, dtype=np.int64).astype(np.uint64))
+    draws = np.arange(1, n_draws + 1, dtype=np.uint64)[:, None] * np.uint64(0xD1B54A32D192ED03)
+    return (_mix64(keys[None, :] ^ draws) >> np.uint64(11)).astype(np.float64) * (1.0 / 9007199254740992.0)
+
+def _powers_array(powers):
+    return np.array([[powers[t]["OFF"], powers[t]["DEF"], powers[t]["SKILL"]] for t in team_list], dtype=np.float64)
+
+# Tabulky výsledků: klíč = (tým1, tým2, fáze, modifikátor1, modifikátor2).
+# Fáze 0 = skupina do 6. dne, 1 = skupina od 7. dne (náhodný útok ×U(0.9, 1.1)), 2 = play-off.
+# Modifikátor = únava (0/1) × 3 + forma (-1/0/+1 podle série ≤-2 / jinak / ≥2) + 1.
+# Modifikátory síly (útok i obrana): domácí Švýcarsko, únava (hrál včera, soupeř ne), forma podle série
+# (≤-2 / jinak / ≥2). Jiné hodnoty se zkouší ve scénářích "co kdyby" (outcome_model(powers, mods)).
+MODEL_MODS = {"host": 1.05, "tired": 0.95, "form": (0.96, 1.0, 1.04)}
+MAX_GOALS = 64
+_GL_X, _GL_W = np.polynomial.legendre.leggauss(16)
+
+def match_kind(stage, current_day):
+    return 2 if not stage.startswith("G") else (1 if current_day >= 7 else 0)
+
+def match_bucket(tired, streak):
+    return np.asarray(tired, dtype=np.int64) * 3 + np.where(streak >= 2, 2, np.where(streak <= -2, 0, 1))
+
+def match_key(a, b, kind, b1, b2):
+    return (((np.asarray(a, dtype=np.int64) * len(team_list) + b) * 3 + kind) * 6 + b1) * 6 + b2
+
+def _poisson_mix(lams, weights, k_max):
+    # Rozdělení Poissonova počtu gólů, kde λ je směs přes uzly kvadratury (pro fázi 1 přes U(0.9, 1.1))
+    k = np.arange(k_max + 1); log_fact = np.concatenate([[0.0], np.cumsum(np.log(k[1:]))])
+    lams = np.asarray(lams, dtype=np.float64)[:, None]
+    return (np.asarray(weights)[:, None] * np.exp(k * np.log(lams) - lams - log_fact)).sum(axis=0)
+
+def _alias_table(p):
+    # Vose: tabulka (prob, alias), ze které se vzorkuje jedním U(0,1) v O(1)
+    n = len(p); q = p * n; prob = np.ones(n); alias = np.arange(n)
+    small = [i for i in range(n) if q[i] < 1.0]; large = [i for i in range(n) if q[i] >= 1.0]
+    while small and large:
+        s, l = small.pop(), large.pop()
+        prob[s], alias[s] = q[s], l
+        q[l] -= 1.0 - q[s]
+        (small if q[l] < 1.0 else large).append(l)
+    return prob, alias
+
+class OutcomeModel:
+    # Přesné rozdělení konečného výsledku (skóre + REG/PP/SN) podle Poissonova modelu, pravidel o prázdné
+    # bráně a prodloužení/nájezdech pro každý klíč zápasu; počítá se líně a vzorkuje alias metodou.
+    def __init__(self, powers, mods=None):
+        self.P = _powers_array(powers); self.mods = dict(MODEL_MODS, **(mods or {}))
+        self.key_to_tab = np.full(len(team_list) ** 2 * 3 * 36, -1, np.int64)
+        self.tables = []; self._stack = None; self._win = {}; self.cdfs = []; self._cdf_stack = None
+        self._lock = threading.Lock()   # model sdílí vlákno stránky i úlohy na pozadí
+
+    def _mult(self, team, bucket):
+        tired, form = divmod(int(bucket), 3)
+        return (self.mods["host"] if team == host_id else 1.0) * (self.mods["tired"] if tired else 1.0) * self.mods["form"][form]
+
+    def pmf(self, key):
+        key, b2 = divmod(int(key), 6); key, b1 = divmod(key, 6); key, kind = divmod(key, 3); a, b = divmod(key, len(team_list))
+        m1, m2 = self._mult(a, b1), self._mult(b, b2)
+        off1, def1, sk1 = self.P[a, 0] * m1, self.P[a, 1] * m1, self.P[a, 2]
+        off2, def2, sk2 = self.P[b, 0] * m2, self.P[b, 1] * m2, self.P[b, 2]
+        base_avg = 2.0 if kind == 2 else 2.4
+        x, w = (0.9 + 0.1 * (_GL_X + 1), _GL_W / 2) if kind == 1 else (np.ones(1), np.ones(1))
+        l1 = base_avg * (off1 * x / def2)**1.4; l2 = base_avg * (off2 * x / def1)**1.4
+        k_max = min(int(max(l1.max(), l2.max()) + 12 * np.sqrt(max(l1.max(), l2.max())) + 12), MAX_GOALS - 3)
+        j = np.outer(_poisson_mix(l1, w, k_max), _poisson_mix(l2, w, k_max))
+
+        # Gól o jeden rozdíl: 25 % gól do prázdné brány vedoucího, jinak 35 % vyrovnání (-> prodloužení)
+        F = np.zeros((k_max + 3, k_max + 3, 3)); tie = np.zeros(k_max + 2)
+        i, k = np.indices(j.shape)
+        lead1 = i == k + 1; lead2 = k == i + 1; eq = i == k; rest = ~(lead1 | lead2 | eq)
+        F[i[rest], k[rest], 0] += j[rest]
+        F[i[lead1] + 1, k[lead1], 0] += 0.25 * j[lead1]; F[i[lead1], k[lead1], 0] += 0.75 * 0.65 * j[lead1]
+        F[i[lead2], k[lead2] + 1, 0] += 0.25 * j[lead2]; F[i[lead2], k[lead2], 0] += 0.75 * 0.65 * j[lead2]
+        tie[i[lead1]] += 0.75 * 0.35 * j[lead1]; tie[k[lead2]] += 0.75 * 0.35 * j[lead2]; tie[i[eq]] += j[eq]
+        q = sk1 / (sk1 + sk2); s = np.arange(k_max + 2)
+        F[s + 1, s, 1] += 0.65 * q * tie; F[s, s + 1, 1] += 0.65 * (1 - q) * tie
+        F[s + 1, s, 2] += 0.35 * q * tie; F[s, s + 1, 2] += 0.35 * (1 - q) * tie
+
+        s1, s2, rt = np.nonzero(F > 1e-16)
+        p = F[s1, s2, rt]
+        return (s1 * MAX_GOALS + s2) * 3 + rt, p / p.sum()
+
+    def win_prob(self, key):
+        # P(vyhraje tým 1) podle přesného rozdělení, pro přesné play-off (playoff_probs)
+        key = int(key)
+        if key not in self._win:
+            codes, p = self.pmf(key); self._win[key] = float(p[codes // 3 // MAX_GOALS > codes // 3 % MAX_GOALS].sum())
+        return self._win[key]
+
+    def _build(self, keys):
+        if (self.key_to_tab[keys] >= 0).all(): return
+        with self._lock:
+            for key in np.unique(keys[self.key_to_tab[keys] < 0]):
+                profiler.count("tabulky výsledků")
+                codes, p = self.pmf(key)
+                self.tables.append((codes,) + _alias_table(p))
+                # Pro sample_coupled: výsledky od nejhoršího po nejlepší pro tým 1 (body, rozdíl skóre, jeho góly)
+                s1, s2, rt = codes // 3 // MAX_GOALS, codes // 3 % MAX_GOALS, codes % 3
+                order = np.lexsort((s1, s1 - s2, np.where(s1 > s2, np.where(rt == 0, 3, 2), np.where(rt == 0, 0, 1))))
+                cdf = np.cumsum(p[order]); cdf[-1] = 1.0
+                self.cdfs.append((codes[order], cdf))
+                self.key_to_tab[key] = len(self.tables) - 1
+                self._stack = None; self._cdf_stack = None
+
+    def _stacked(self):
+        with self._lock:
+            if self._stack is None:
+                width = max(len(t[0]) for t in self.tables); n_tab = len(self.tables)
+                codes = np.zeros((n_tab, width), np.int64); prob = np.ones((n_tab, width)); alias = np.zeros((n_tab, width), np.int64)
+                for r, (c, p, a) in enumerate(self.tables):
+                    codes[r, :len(c)], prob[r, :len(c)], alias[r, :len(c)] = c, p, a
+                self._stack = (codes, prob, alias, np.array([len(t[0]) for t in self.tables]))
+            return self._stack
+
+    def sample(self, keys, u):
+        # Jeden U(0,1) na zápas: celá část u·n vybere sloupec, zlomková část rozhodne sloupec vs. alias
+        keys = np.asarray(keys, dtype=np.int64); self._build(keys); profiler.count("simulované zápasy", len(keys))
+        codes, prob, alias, n_out = self._stacked()
+        tab = self.key_to_tab[keys]; x = u * n_out[tab]; col = np.minimum(x.astype(np.int64), n_out[tab] - 1)
+        code = codes[tab, np.where(x - col < prob[tab, col], col, alias[tab, col])]
+        return code // 3 // MAX_GOALS, code // 3 % MAX_GOALS, code % 3
+
+    def sample_coupled(self, keys, u):
+        # Inverzní distribuční funkce přes výsledky seřazené od nejhoršího po nejlepší pro tým 1: se stejným u
+        # dá silnější tým stejný nebo lepší výsledek (společná náhodná čísla ve whatif_sweep). Tabulky jsou
+        # za sebou v jednom poli jako index tabulky + cdf, takže stačí jeden searchsorted.
+        keys = np.asarray(keys, dtype=np.int64); self._build(keys); profiler.count("simulované zápasy", len(keys))
+        with self._lock:
+            if self._cdf_stack is None:
+                self._cdf_stack = (np.concatenate([t + c for t, (_, c) in enumerate(self.cdfs)]), np.concatenate([c for c, _ in self.cdfs]))
+            flat_cdf, flat_codes = self._cdf_stack
+        code = flat_codes[np.searchsorted(flat_cdf, self.key_to_tab[keys] + u, side="right")]
+        return code // 3 // MAX_GOALS, code // 3 % MAX_GOALS, code % 3
+
+    def sample_one(self, key, u):
+        # Skalární cesta pro sériový engine: bez skládání tabulek, stejný výsledek jako sample()
+        self._build(np.array([key], dtype=np.int64)); profiler.count("simulované zápasy")
+        codes, prob, alias = self.tables[self.key_to_tab[key]]
+        x = u * len(codes); col = min(int(x), len(codes) - 1)
+        code = int(codes[col if x - col < prob[col] else alias[col]])
+        return code // 3 // MAX_GOALS, code // 3 % MAX_GOALS, code % 3
+
+_models, _models_by_id = {}, {}
+
+def outcome_model(powers, mods=None):
+    # Rychlá cesta podle id(powers) s kontrolou obsahu, jinak podle obsahového klíče
+    if mods is None:
+        hit = _models_by_id.get(id(powers))
+        if hit is not None and hit[0] == powers: return hit[1]
+    key = content_key(MODEL_REV, powers) if mods is None else content_key(MODEL_REV, powers, mods)
+    # Scénáře "co kdyby" (úpravy modelu i síly týmů) nesmí růst donekonečna
+    if key not in _models and len(_models) > 64: _models.clear()
+    model = _models.get(key) or _models.setdefault(key, OutcomeModel(powers, mods))   # setdefault: jeden model i při souběhu vláken
+    if mods is not None: return model
+    if len(_models_by_id) > 64: _models_by_id.clear()
+    _models_by_id[id(powers)] = ({t: dict(v) for t, v in powers.items()}, model)
+    return model
+
+def sim_match(t1, t2, match_seed, powers, db, stage, current_day, last_played_dict, form_streak1=0, form_streak2=0):
+    if (t1, t2, stage) in db: 
+        res = db[(t1, t2, stage)]
+        return res[0], res[1], res[2]
+    if (t2, t1, stage) in db: 
+        res = db[(t2, t1, stage)]
+        return res[1], res[0], res[2]
+
+    rest1 = current_day - last_played_dict.get(t1, -99)
+    rest2 = current_day - last_played_dict.get(t2, -99)
+    b1 = match_bucket(rest1 == 1 and rest2 > 1, form_streak1)
+    b2 = match_bucket(rest2 == 1 and rest1 > 1, form_streak2)
+    key = int(match_key(team_idx[t1], team_idx[t2], match_kind(stage, current_day), b1, b2))
+    s1, s2, rt = outcome_model(powers).sample_one(key, counter_uniforms([match_seed])[0, 0])
+    return s1, s2, rt_codes[rt]
+
+def get_iihf_rankings(group_teams, group_matches):
+    full_stats = {t: {"B": 0, "GF": 0, "GA": 0} for t in group_teams}
+    for m in group_matches:
+        t1, t2, s1, s2, rt = m["t1"], m["t2"], m["s1"], m["s2"], m["rt"]
+        full_stats[t1]["GF"] += s1; full_stats[t1]["GA"] += s2
+        full_stats[t2]["GF"] += s2; full_stats[t2]["GA"] += s1
+        if rt == "REG":
+            if s1 > s2: full_stats[t1]["B"] += 3
+            else: full_stats[t2]["B"] += 3
+        else:
+            if s1 > s2: full_stats[t1]["B"] += 2; full_stats[t2]["B"] += 1
+            else: full_stats[t2]["B"] += 2; full_stats[t1]["B"] += 1
+
+    def solve_tie(tied_teams):
+        if len(tied_teams) <= 1: return tied_teams
+        mini_stats = {t: {"B": 0, "D": 0, "GF": 0} for t in tied_teams}
+        for m in group_matches:
+            if m["t1"] in tied_teams and m["t2"] in tied_teams:
+                t1, t2, s1, s2, rt = m["t1"], m["t2"], m["s1"], m["s2"], m["rt"]
+                mini_stats[t1]["GF"] += s1; mini_stats[t1]["D"] += (s1 - s2)
+                mini_stats[t2]["GF"] += s2; mini_stats[t2]["D"] += (s2 - s1)
+                if rt == "REG":
+                    if s1 > s2: mini_stats[t1]["B"] += 3
+                    else: mini_stats[t2]["B"] += 3
+                else:
+                    if s1 > s2: mini_stats[t1]["B"] += 2; mini_stats[t2]["B"] += 1
+                    else: mini_stats[t2]["B"] += 2; mini_stats[t1]["B"] += 1
+        return sorted(tied_teams, key=lambda t: (mini_stats[t]["B"], mini_stats[t]["D"], mini_stats[t]["GF"]), reverse=True)
+
+    points_groups = {}
+    for t in group_teams:
+        b = full_stats[t]["B"]; points_groups.setdefault(b, []).append(t)
+    sorted_final = []
+    for b in sorted(points_groups.keys(), reverse=True):
+        sorted_final.extend(solve_tie(points_groups[b]))
+    return sorted_final, full_stats
+
+def _db_result(db, t1, t2, stage):
+    if (t1, t2, stage) in db: return db[(t1, t2, stage)]
+    if (t2, t1, stage) in db:
+        res = db[(t2, t1, stage)]
+        return res[1], res[0], res[2]
+    return None
+
+_frozen_cache = {}
+
+def compile_frozen_state(db, version):
+    # Odehrané zápasy jsou ve všech seedech stejné: stav po posledním zapsaném zápase se spočítá jednou
+    # a simulace pak pokračuje až od prvního neodehraného zápasu rozpisu.
+    key = (version, frozenset(db.items()))
+    if key in _frozen_cache: return _frozen_cache[key]
+    if len(_frozen_cache) > 64: _frozen_cache.clear()   # každý nový výsledek i scénář dá nový stav
+    matches, last_played = [], {}
+    for d, t1, t2, gn in sched:
+        res = _db_result(db, t1, t2, f"G{gn}")
+        if res is None: break
+        matches.append({"d": d, "t1": t1, "t2": t2, "s1": res[0], "s2": res[1], "rt": res[2], "stg": f"G{gn}"})
+        last_played[t1] = date_mapping[d]
+        last_played[t2] = date_mapping[d]
+
+    frozen = {
+        "n": len(matches), "matches": matches, "last_played": last_played,
+        "form": form_tracker(matches, len(dates_list)),
+    }
+    _frozen_cache[key] = frozen
+    return frozen
+
+def run_tourney(seed, powers, db, version):
+    tp = profiler.start(); profiler.count("turnaje (sériově)")
+    frozen = compile_frozen_state(db, version)
+    matches = list(frozen["matches"])
+    last_played = dict(frozen["last_played"])
+    form = frozen["form"].copy()
+    
+    for i, (d, t1, t2, gn) in enumerate(sched[frozen["n"]:], frozen["n"]):
+        day_num = date_mapping[d]
+        # Tým hraje nejvýš jednou denně, takže forma po předchozím zápase = forma před dnešním dnem
+        s1, s2, rt = sim_match(t1, t2, seed * 1000 + i, powers, db, f"G{gn}", day_num, last_played, form.streak(t1), form.streak(t2))
+        matches.append({"d": d, "t1": t1, "t2": t2, "s1": s1, "s2": s2, "rt": rt, "stg": f"G{gn}"})
+        form.push(matches[-1])
+        last_played[t1] = day_num
+        last_played[t2] = day_num
+    tp = profiler.lap("sériově: skupiny", tp)
+
+    group_rankings = {"A": [], "B": []}
+    global_seed_stats = {} 
+    
+    for gn in ["A", "B"]:
+        g_m = [m for m in matches if m["stg"] == f"G{gn}"]
+        sorted_tms, stats = get_iihf_rankings(groups_def[gn], g_m)
+        group_rankings[gn] = sorted_tms
+        for i, t in enumerate(sorted_tms):
+            global_seed_stats[t] = {"Pos": i+1, "B": stats[t]["B"], "D": stats[t]["GF"]-stats[t]["GA"], "GF": stats[t]["GF"]}
+    tp = profiler.lap("sériově: pořadí", tp)
+
+    A = group_rankings["A"]
+    B = group_rankings["B"]
+    qf_pairs = [(A[0], B[3]), (B[0], A[3]), (A[1], B[2]), (B[1], A[2])]
+    qf_winners = []
+    
+    cf_day = date_mapping["Čtvrtek 28. května (ČF)"]
+    for i, (t1, t2) in enumerate(qf_pairs):
+        s1, s2, rt = sim_match(t1, t2, seed * 1000 + 100 + i, powers, db, "PO", cf_day, last_played)
+        w = t1 if s1 > s2 else t2; qf_winners.append(w)
+        matches.append({"d": "Čtvrtek 28. května (ČF)", "t1": t1, "t2": t2, "s1": s1, "s2": s2, "rt": rt, "stg": "PO", "lbl": qf_labels[i], "w": w})
+        last_played[t1] = cf_day; last_played[t2] = cf_day
+    tp = profiler.lap("sériově: ČF", tp)
+
+    def reseeding_key(t):
+        s = global_seed_stats[t]
+        return (-s["Pos"], s["B"], s["D"], s["GF"]) 
+    
+    sf_seeded = sorted(qf_winners, key=reseeding_key, reverse=True)
+    while len(sf_seeded) < 4: sf_seeded.append("TBD")
+    
+    sf_pairs = [(sf_seeded[0], sf_seeded[3]), (sf_seeded[1], sf_seeded[2])]
+    sf_w, sf_l = [], []
+    sf_day = date_mapping["Sobota 30. května (SF)"]
+    for i, (a, b) in enumerate(sf_pairs):
+        s1, s2, rt = sim_match(a, b, seed * 1000 + 200 + i, powers, db, "PO", sf_day, last_played)
+        w, l = (a, b) if s1 > s2 else (b, a)
+        sf_w.append(w); sf_l.append(l)
+        matches.append({"d": "Sobota 30. května (SF)", "t1": a, "t2": b, "s1": s1, "s2": s2, "rt": rt, "stg": "PO", "lbl": sf_labels[i], "w": w})
+        last_played[a] = sf_day; last_played[b] = sf_day
+    tp = profiler.lap("sériově: SF", tp)
+
+    med_day = date_mapping["Neděle 31. května (Medaile)"]
+    if len(sf_l) >= 2:
+        s1, s2, rt = sim_match(sf_l[0], sf_l[1], seed * 1000 + 300, powers, db, "PO", med_day, last_played)
+        matches.append({"d": "Neděle 31. května (Medaile)", "t1": sf_l[0], "t2": sf_l[1], "s1": s1, "s2": s2, "rt": rt, "stg": "PO", "lbl": "O 3. místo (15:30, Curych)", "w": sf_l[0] if s1>s2 else sf_l[1]})
+    
+    if len(sf_w) >= 2:
+        s1, s2, rt = sim_match(sf_w[0], sf_w[1], seed * 1000 + 400, powers, db, "PO", med_day, last_played)
+        matches.append({"d": "Neděle 31. května (Medaile)", "t1": sf_w[0], "t2": sf_w[1], "s1": s1, "s2": s2, "rt": rt, "stg": "PO", "lbl": "Finále (20:15, Curych)", "w": sf_w[0] if s1>s2 else sf_w[1]})
+    profiler.lap("sériově: medaile", tp)
+    return matches
+
+# --- 5. DÁVKOVÝ ENGINE (NumPy, turnaje × zápasy) ---
+po_slots = [100, 101, 102, 103, 200, 201, 300, 400]
+po_dates = ["Čtvrtek 28. května (ČF)"] * 4 + ["Sobota 30. května (SF)"] * 2 + ["Neděle 31. května (Medaile)"] * 2
+po_labels = qf_labels + sf_labels + ["O 3. místo (15:30, Curych)", "Finále (20:15, Curych)"]
+sched_t1 = np.array([team_idx[m[1]] for m in sched]); sched_t2 = np.array([team_idx[m[2]] for m in sched])
+sched_onehot1 = np.eye(len(team_list))[sched_t1]; sched_onehot2 = np.eye(len(team_list))[sched_t2]
+
+def batch_uniforms(seeds, slot, n_draws=1):
+    return counter_uniforms(np.asarray(seeds, dtype=np.int64) * 1000 + slot, n_draws)
+
+def _streak_step(streak, won):
+    return np.where(won, np.where(streak > 0, np.minimum(streak + 1, 3), 1), np.where(streak < 0, np.maximum(streak - 1, -3), -1)).astype(np.int8)
+
+def _batch_sim(model, u, t1, t2, kind, rest1, rest2, streak1, streak2, coupled=False):
+    # Vektorová obdoba sim_match: t1/t2 jsou ID týmů (skalár nebo pole délky N), u je pole N uniformních čísel
+    b1 = match_bucket((rest1 == 1) & (rest2 > 1), streak1); b2 = match_bucket((rest2 == 1) & (rest1 > 1), streak2)
+    keys = np.broadcast_to(match_key(t1, t2, kind, b1, b2), u.shape)
+    return model.sample_coupled(keys, u) if coupled else model.sample(keys, u)
+
+def batch_group_stage(seeds, powers, db, version, mods=None, coupled=False):
+    # mods/coupled jen pro whatif_sweep (jiné modifikátory, monotónní vzorkování); výchozí = stejné jako run_tourney
+    n = len(seeds); model = outcome_model(powers, mods)
+    frozen = compile_frozen_state(db, version); k = frozen["n"]
+    S1 = np.zeros((n, len(sched)), np.int16); S2 = np.zeros_like(S1); RT = np.zeros((n, len(sched)), np.int8)
+    S1[:, :k] = [m["s1"] for m in frozen["matches"]]; S2[:, :k] = [m["s2"] for m in frozen["matches"]]
+    RT[:, :k] = [rt_codes.index(m["rt"]) for m in frozen["matches"]]
+    streak = np.tile(np.array([frozen["form"].streak(t) for t in team_list], np.int8), (n, 1))
+    last = np.array([frozen["last_played"].get(t, -99) for t in team_list])
+    for i, (d, t1, t2, gn) in enumerate(sched[k:], k):
+        a, b = team_idx[t1], team_idx[t2]; day = date_mapping[d]
+        fixed = _db_result(db, t1, t2, f"G{gn}")
+        if fixed:
+            S1[:, i], S2[:, i], RT[:, i] = fixed[0], fixed[1], rt_codes.index(fixed[2])
+        else:
+            u = batch_uniforms(seeds, i)[0]
+            S1[:, i], S2[:, i], RT[:, i] = _batch_sim(model, u, a, b, match_kind(f"G{gn}", day), day - last[a], day - last[b], streak[:, a], streak[:, b], coupled)
+        won = S1[:, i] > S2[:, i]
+        streak[:, a] = _streak_step(streak[:, a], won); streak[:, b] = _streak_step(streak[:, b], ~won)
+        last[a] = last[b] = day
+    return S1, S2, RT, last
+
+def batch_rankings(S1, S2, RT):
+    # Vektorová obdoba get_iihf_rankings: body, pak minitabulka týmů se stejným počtem bodů (B, rozdíl, GF),
+    # nakonec pořadí v groups_def (stabilní řazení jako sorted()).
+    # Součty přes zápasy jsou float64 maticová násobení (BLAS, celá čísla v nich vyjdou přesně); celočíselné @
+    # BLAS nepoužívá a bylo nejpomalejším krokem dávky
+    S1 = S1.astype(np.float64); S2 = S2.astype(np.float64)
+    pts1 = np.where(S1 > S2, np.where(RT == 0, 3.0, 2.0), np.where(RT == 0, 0.0, 1.0)); pts2 = 3 - pts1
+    tot = lambda x1, x2: (x1 @ sched_onehot1 + x2 @ sched_onehot2).astype(np.int32)
+    B = tot(pts1, pts2); GF = tot(S1, S2); GA = tot(S2, S1)
+    tied = B[:, sched_t1] == B[:, sched_t2]
+    mB = tot(pts1 * tied, pts2 * tied)
+    mD = tot((S1 - S2) * tied, (S2 - S1) * tied)
+    mGF = tot(S1 * tied, S2 * tied)
+
+    n = S1.shape[0]; ranks = {}; pos = np.zeros((n, len(team_list)), np.int8)
+    for gn in ["A", "B"]:
+        gt = np.array([team_idx[t] for t in groups_def[gn]])
+        # Kritéria složená do jednoho int64 (10 bitů na každé, nakonec pořadí ve skupině) a jeden argsort po řádcích;
+        # np.lexsort přes 5 klíčů s axis=-1 byl několikrát pomalejší
+        key = ((((512 - B[:, gt].astype(np.int64)) << 10 | 512 - mB[:, gt]) << 10 | 512 - mD[:, gt]) << 10 | 512 - mGF[:, gt]) << 3 | np.arange(len(gt))
+        ranks[gn] = gt[np.argsort(key, axis=-1)]
+        np.put_along_axis(pos, ranks[gn], np.arange(1, len(gt) + 1, dtype=np.int8)[None, :], axis=1)
+    return ranks, pos, B, GF - GA, GF
+
+def _qf_pairs(ranks):
+    A, Bg = ranks["A"], ranks["B"]
+    return [(A[:, 0], Bg[:, 3]), (Bg[:, 0], A[:, 3]), (A[:, 1], Bg[:, 2]), (Bg[:, 1], A[:, 2])]
+
+def _sf_order(W, pos, key):
+    # Přenasazení vítězů ČF (W v pořadí zápasů ČF): místo ve skupině, body, rozdíl skóre, góly (key = _seed_key), pořadí ČF
+    at = lambda X: np.take_along_axis(X, W, axis=1)
+    order = np.lexsort((np.broadcast_to(np.arange(4), W.shape), -at(key), at(pos)), axis=-1)
+    return np.take_along_axis(W, order, axis=1)
+
+def batch_playoffs(seeds, powers, db, ranks, pos, key, last):
+    n = len(seeds); rows = np.arange(n); model = outcome_model(powers)
+    last = np.tile(last, (n, 1)); zero = np.zeros(n, np.int8)
+    fix = [[_db_result(db, a, b, "PO") for b in team_list] for a in team_list]
+    T1 = np.zeros((n, 8), np.int8); T2 = np.zeros_like(T1); S1 = np.zeros((n, 8), np.int16); S2 = np.zeros_like(S1); RT = np.zeros((n, 8), np.int8)
+
+    def play(j, a, b):
+        day = date_mapping[po_dates[j]]
+        u = batch_uniforms(seeds, po_slots[j])[0]
+        s1, s2, rt = _batch_sim(model, u, a, b, match_kind("PO", day), day - last[rows, a], day - last[rows, b], zero, zero)
+        for k in np.flatnonzero([fix[x][y] is not None for x, y in zip(a, b)]):
+            s1[k], s2[k], rt[k] = fix[a[k]][b[k]][0], fix[a[k]][b[k]][1], rt_codes.index(fix[a[k]][b[k]][2])
+        T1[:, j], T2[:, j], S1[:, j], S2[:, j], RT[:, j] = a, b, s1, s2, rt
+        last[rows, a] = day; last[rows, b] = day
+        w1 = s1 > s2
+        return np.where(w1, a, b), np.where(w1, b, a)
+
+    tp = profiler.start()
+    W = np.stack([play(j, a, b)[0] for j, (a, b) in enumerate(_qf_pairs(ranks))], axis=1)
+    tp = profiler.lap("dávka: ČF", tp)
+
+    sf = _sf_order(W, pos, key)
+    w1, l1 = play(4, sf[:, 0], sf[:, 3])
+    w2, l2 = play(5, sf[:, 1], sf[:, 2])
+    tp = profiler.lap("dávka: SF", tp)
+    play(6, l1, l2)
+    play(7, w1, w2)
+    profiler.lap("dávka: medaile", tp)
+    return T1, T2, S1, S2, RT
+
+def run_tourney_batch(seeds, powers, db, version):
+    seeds = np.asarray(seeds, dtype=np.int64)
+    tp = profiler.start(); profiler.count("turnaje (dávka)", len(seeds))
+    S1, S2, RT, last = batch_group_stage(seeds, powers, db, version)
+    profiler.lap("dávka: skupiny", tp)
+    return _batch_knockout(seeds, powers, db, S1, S2, RT, last)
+
+def _batch_knockout(seeds, powers, db, S1, S2, RT, last):
+    # Pořadí ve skupinách a play-off k hotovým výsledkům skupin; zbytek run_tourney_batch (i pro _store_patch)
+    tp = profiler.start()
+    ranks, pos, B, D, GF = batch_rankings(S1, S2, RT)
+    profiler.lap("dávka: pořadí", tp)
+    key = _seed_key(B, D, GF)
+    pT1, pT2, pS1, pS2, pRT = batch_playoffs(seeds, powers, db, ranks, pos, key, last)
+    n = len(seeds)
+    return {
+        "seeds": seeds, "pos": pos, "key": key,
+        "t1": np.hstack([np.broadcast_to(sched_t1, (n, len(sched))), pT1]), "t2": np.hstack([np.broadcast_to(sched_t2, (n, len(sched))), pT2]),
+        "s1": np.hstack([S1, pS1]), "s2": np.hstack([S2, pS2]), "rt": np.hstack([RT, pRT]),
+    }
+
+def _mc_count_batch(res_stats, batch):
+    n_g = len(sched); T1, T2, S1, S2 = batch["t1"], batch["t2"], batch["s1"], batch["s2"]
+    qf = np.bincount(np.concatenate([T1[:, n_g:n_g + 4].ravel(), T2[:, n_g:n_g + 4].ravel()]), minlength=len(team_list))
+    fin, bro = n_g + 7, n_g + 6
+    gold = np.where(S1[:, fin] > S2[:, fin], T1[:, fin], T2[:, fin]); silver = np.where(S1[:, fin] > S2[:, fin], T2[:, fin], T1[:, fin])
+    bronze = np.where(S1[:, bro] > S2[:, bro], T1[:, bro], T2[:, bro])
+    for t, r in res_stats.items():
+        i = team_idx[t]
+        r["QF"] += int(qf[i]); r["Gold"] += int((gold == i).sum()); r["Silver"] += int((silver == i).sum()); r["Bronze"] += int((bronze == i).sum())
+        r["G_Seeds"].extend(batch["seeds"][gold == i].tolist())
+        r["M_Seeds"].extend(batch["seeds"][(gold == i) | (silver == i) | (bronze == i)].tolist())
+
+# --- SLOUPCOVÉ ÚLOŽIŠTĚ SIMULACÍ (memmap) ---
+STORE_FORMAT = 2
+stage_codes = ["GA", "GB", "PO"]
+match_dtype = np.dtype([("t1", "u1"), ("t2", "u1"), ("s1", "u1"), ("s2", "u1"), ("rt", "u1"), ("day", "u1"), ("stg", "u1")])
+# key = _seed_key(body, rozdíl skóre, góly) po skupinách: _store_patch z něj přepočítá přenasazení SF bez nového pořadí
+store_dtype = np.dtype([("m", match_dtype, (len(sched) + len(po_slots),)), ("pos", "u1", (len(team_list),)), ("key", "i8", (len(team_list),))])
+match_days = np.array([day_index[m[0]] for m in sched] + [day_index[d] for d in po_dates])
+match_stages = np.array([stage_codes.index(f"G{m[3]}") for m in sched] + [stage_codes.index("PO")] * len(po_slots))
+
+def encode_batch(batch):
+    rows = np.zeros(len(batch["seeds"]), store_dtype)
+    for f in ["t1", "t2", "s1", "s2", "rt"]: rows["m"][f] = batch[f]
+    rows["m"]["day"] = match_days; rows["m"]["stg"] = match_stages; rows["pos"] = batch["pos"]; rows["key"] = batch["key"]
+    return rows
+
+def store_to_batch(rows, first_seed):
+    batch = {f: rows["m"][f] for f in ["t1", "t2", "s1", "s2", "rt"]}
+    batch.update(seeds=np.arange(first_seed, first_seed + len(rows)), pos=rows["pos"])
+    return batch
+
+def decode_tourney(rows, k):
+    matches = []
+    for j, x in enumerate(rows[k]["m"]):
+        t1, t2, s1, s2 = team_list[x["t1"]], team_list[x["t2"]], int(x["s1"]), int(x["s2"])
+        m = {"d": dates_list[x["day"]], "t1": t1, "t2": t2, "s1": s1, "s2": s2, "rt": rt_codes[x["rt"]], "stg": stage_codes[x["stg"]]}
+        if m["stg"] == "PO": m.update(lbl=po_labels[j - len(sched)], w=t1 if s1 > s2 else t2)
+        matches.append(m)
+    return matches
+
+def _cache_evict(keep=None, max_bytes=None):
+    # Nejdéle nepoužité soubory nad strop CACHE_MAX_BYTES (čte se až teď, jde přepsat jako CACHE_DIR). Soubor keep
+    # (právě zapsaný) se nemaže nikdy, i když je sám větší než strop: volající ho hned otevírá.
+    max_bytes = CACHE_MAX_BYTES if max_bytes is None else max_bytes; entries = []
+    for e in os.scandir(CACHE_DIR):
+        if e.name.endswith((".npy", ".pkl")):
+            try: entries.append((e.stat().st_mtime, e.stat().st_size, e.path))
+            except FileNotFoundError: pass
+    total = 0
+    for _, size, path in sorted(entries, key=lambda e: (e[2] == keep, e[0]), reverse=True):
+        total += size
+        if total > max_bytes and path != keep:
+            try: os.remove(path)
+            except FileNotFoundError: pass
+
+def _cache_write(path, write_fn):
+    # Zápis pod dočasným jménem + os.replace: ostatní procesy vidí buď starý, nebo celý nový soubor
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        write_fn(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp): os.remove(tmp)
+    _cache_evict(keep=path)
+
+def disk_cache_get(key):
+    path = os.path.join(CACHE_DIR, f"mc-{key}.pkl")
+    try:
+        with open(path, "rb") as f: value = pickle.load(f)
+        os.utime(path); profiler.count("disk cache: zásah")
+        return value
+    except Exception:
+        profiler.count("disk cache: minutí")
+        return None
+
+def disk_cache_put(key, value):
+    def write(tmp):
+        with open(tmp, "wb") as f: pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    _cache_write(os.path.join(CACHE_DIR, f"mc-{key}.pkl"), write)
+
+def sim_store_path(n_sims, powers, db, version):
+    return os.path.join(CACHE_DIR, f"store-{content_key(STORE_FORMAT, MODEL_REV, n_sims, powers, db, sched, version)}.npy")
+
+def _store_lineage_key(n_sims, powers, version):
+    return content_key("lineage", STORE_FORMAT, MODEL_REV, n_sims, powers, sched, version)
+
+def _store_register(n_sims, powers, db, version):
+    # Seznam db, pro které se zapsala banka (nejnovější na konci); _store_parent v něm hledá předchůdce
+    key = _store_lineage_key(n_sims, powers, version)
+    dbs = [d for d in disk_cache_get(key) or [] if d != db]
+    disk_cache_put(key, dbs[-(STORE_LINEAGE - 1):] + [db])
+
+def _store_parent(n_sims, powers, db, version):
+    # Uložená banka pro db bez některých nových výsledků (stará db je podmnožinou nové), nejbližší nové db
+    for old in sorted(disk_cache_get(_store_lineage_key(n_sims, powers, version)) or [], key=len, reverse=True):
+        if old != db and old.items() <= db.items() and os.path.exists(sim_store_path(n_sims, powers, old, version)): return old
+    return None
+
+def _store_patch(old, seeds, powers, db_old, db, version):
+    # Řádky banky pro db_old -> řádky pro db, bitově stejné jako encode_batch(run_tourney_batch(seeds, powers, db, ...)).
+    # Seed s čítačovým RNG zahraje každý nezapsaný zápas stejně, dokud je stejný stav (série výher, únava):
+    # - turnaj se stejným skóre nově zapsaných zápasů se nemění vůbec,
+    # - se stejnými vítězi se liší jen skóre těch zápasů, takže se posunou jen body/skóre dvou týmů v key.
+    #   Pořadí ve skupině se počítá znovu, jen když se změnily body nebo mají oba týmy stejně bodů (minitabulka);
+    #   play-off se hraje znovu, jen když se změnily dvojice ČF nebo SF (jinak má stejné zápasy i náhodná čísla),
+    # - s jiným vítězem se turnaj zahraje znovu celý.
+    # Výsledná banka je tedy přesně ta, kterou by dal nový běh se seedy 1..n, takže odhady se nemění ani o bit.
+    rows = np.empty(len(old), store_dtype); rows.view(np.uint8)[:] = old.view(np.uint8); n_g = len(sched); m = rows["m"]
+    S1, S2, RT = (m[f][:, :n_g].astype(np.int16) for f in ["s1", "s2", "rt"])
+    K = rows["key"].copy(); pts = lambda s1, s2, rt: np.where(s1 > s2, np.where(rt == 0, 3, 2), np.where(rt == 0, 0, 1))
+    same = np.ones(len(rows), bool); redo = np.zeros(len(rows), bool); rerank = np.zeros(len(rows), bool); pairs = []
+    for i, (d, t1, t2, gn) in enumerate(sched):
+        res = _db_result(db, t1, t2, f"G{gn}")
+        if res is None or _db_result(db_old, t1, t2, f"G{gn}") is not None: continue
+        s1, s2, rt = res[0], res[1], rt_codes.index(res[2]); a, b = team_idx[t1], team_idx[t2]
+        same &= (S1[:, i] == s1) & (S2[:, i] == s2) & (RT[:, i] == rt)
+        redo |= (S1[:, i] > S2[:, i]) != (s1 > s2)
+        dB = (pts(s1, s2, rt) - pts(S1[:, i], S2[:, i], RT[:, i])).astype(np.int64); dD = ((s1 - s2) - (S1[:, i] - S2[:, i])).astype(np.int64)
+        K[:, a] += (dB << 20) + (dD << 10) + (s1 - S1[:, i]); K[:, b] += (-dB << 20) + (-dD << 10) + (s2 - S2[:, i])
+        rerank |= dB != 0; pairs.append((a, b))
+        S1[:, i], S2[:, i], RT[:, i] = s1, s2, rt
+    if redo.mean() > STORE_PATCH_REDO: return encode_batch(run_tourney_batch(seeds, powers, db, version))
+    for a, b in pairs: rerank |= K[:, a] >> 20 == K[:, b] >> 20
+    new_po = any(k[2] == "PO" and k not in db_old for k in db)
+    patch = np.flatnonzero(~redo & (~same | new_po))
+    if len(patch):
+        pos, K = rows["pos"][patch], K[patch]; T1, T2 = m["t1"][patch, n_g:], m["t2"][patch, n_g:]
+        ok = np.full(len(patch), not new_po); r = np.flatnonzero(rerank[patch])
+        if len(r):
+            ranks, pos[r], B, D, GF = batch_rankings(S1[patch[r]], S2[patch[r]], RT[patch[r]])
+            K[r] = _seed_key(B, D, GF)
+            for j, (a, b) in enumerate(_qf_pairs(ranks)): ok[r] &= (T1[r, j] == a) & (T2[r, j] == b)
+        w1 = m["s1"][patch, n_g:n_g + 4] > m["s2"][patch, n_g:n_g + 4]
+        sf = _sf_order(np.where(w1, T1[:, :4], T2[:, :4]).astype(np.int64), pos, K)
+        ok &= (T1[:, 4] == sf[:, 0]) & (T2[:, 4] == sf[:, 3]) & (T1[:, 5] == sf[:, 1]) & (T2[:, 5] == sf[:, 2])
+        keep = patch[ok]
+        for f, X in [("s1", S1), ("s2", S2), ("rt", RT)]: m[f][keep, :n_g] = X[keep]
+        rows["pos"][keep] = pos[ok]; rows["key"][keep] = K[ok]
+        replay = patch[~ok]
+        if len(replay):
+            last = np.array([max(date_mapping[d] for d, t1, t2, _ in sched if t in (t1, t2)) for t in team_list])
+            rows[replay] = encode_batch(_batch_knockout(seeds[replay], powers, db, S1[replay], S2[replay], RT[replay], last))
+        profiler.count("úložiště: nové pořadí", len(r)); profiler.count("úložiště: přehrané play-off", len(replay))
+    if redo.any(): rows[redo] = encode_batch(run_tourney_batch(seeds[redo], powers, db, version))
+    profiler.count("úložiště: převzaté turnaje", len(rows) - int(redo.sum()))
+    return rows
+
+def _store_fill(path, lo, hi, powers, db, version, base=None):
+    # base = (cesta, db) starší banky: řádky se z ní jen opraví (_store_patch) místo nové simulace.
+    # Řádky se kopírují po bajtech: přiřazení strukturovaného pole s podpoli jde po prvcích a bylo ~20x pomalejší
+    store = np.load(path, mmap_mode="r+"); old = np.load(base[0], mmap_mode="r") if base else None
+    for c in range(lo, hi, MC_CHUNK):
+        c_hi = min(c + MC_CHUNK, hi); seeds = np.arange(c, c_hi)
+        if base: rows = _store_patch(old[c - 1:c_hi - 1], seeds, powers, base[1], db, version)
+        else: rows = encode_batch(run_tourney_batch(seeds, powers, db, version))
+        store[c - 1:c_hi - 1].view(np.uint8)[:] = rows.view(np.uint8)
+    store.flush()
+
+def _pool(workers):
+    # Úlohy jsou funkce tohoto modulu, takže je worker naimportuje při fork i spawn
+    return ProcessPoolExecutor(workers)
+
+def open_sim_store(n_sims, powers, db, version, workers=MC_WORKERS):
+    # Turnaje seedů 1..n_sims jako memmap na disku (řádek = seed - 1). Soubor se zapíše pod dočasným
+    # jménem a atomicky přejmenuje, takže restartovaný proces ho jen otevře. Po zapsání nového výsledku
+    # se banka nepočítá znovu, ale opraví z banky pro předchozí stav db (_store_patch).
+    path = sim_store_path(n_sims, powers, db, version)
+
+    def write(tmp):
+        np.lib.format.open_memmap(tmp, mode="w+", dtype=store_dtype, shape=(n_sims,)).flush()
+        parent = _store_parent(n_sims, powers, db, version)
+        base = (sim_store_path(n_sims, powers, parent, version), parent) if parent is not None else None
+        shards = _mc_shards(n_sims, workers * 4 if workers > 1 else 1)
+        try:
+            if workers > 1:
+                with _pool(workers) as pool:
+                    list(pool.map(_store_fill, *zip(*[(tmp, lo, hi, powers, db, version, base) for lo, hi in shards])))
+            else:
+                for lo, hi in shards: _store_fill(tmp, lo, hi, powers, db, version, base)
+        except FileNotFoundError:   # starou banku mezitím smazal úklid cache: od nuly
+            if base is None: raise
+            for lo, hi in shards: _store_fill(tmp, lo, hi, powers, db, version)
+
+    # Soubor může mezi kontrolou a otevřením smazat úklid cache v jiném procesu: pak se zapíše znovu.
+    # Otevřený memmap drží data i po smazání souboru, takže stačí, aby se otevření jednou povedlo.
+    for attempt in range(3):
+        if not os.path.exists(path): _cache_write(path, write); _store_register(n_sims, powers, db, version)
+        try:
+            os.utime(path)
+            return np.load(path, mmap_mode="r")
+        except FileNotFoundError:
+            if attempt == 2: raise
+
+# --- INDEX VÝSLEDKŮ (komprimované bitmapy přes seedy) ---
+_SPAN = 1 << 16
+_POPCNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.int64)
+
+def _pack(mask): return np.packbits(mask, bitorder="little")
+def _unpack(bits): return np.unpackbits(bits, bitorder="little").astype(bool)
+
+class OutcomeIndex:
+    # Roaring-like bitmapy: seedy se dělí po 65 536 do kontejnerů; kontejner je buď seznam offsetů (řídký jev),
+    # seznam chybějících offsetů (skoro vždy splněný jev), nebo 8KB bitmapa. Paměť na predikát a kontejner
+    # je tak nejvýš 8 KB a dotaz je jen AND/NOT nad kontejnery, bez průchodu turnaji.
+    MAX_ARRAY = 4096
+
+    def __init__(self):
+        self.universe, self.bitmaps = {}, {}
+
+    def _encode(self, mask, valid):
+        if mask.sum() <= self.MAX_ARRAY: return ("a", np.flatnonzero(mask).astype(np.uint16))
+        missing = valid & ~mask
+        if missing.sum() <= self.MAX_ARRAY: return ("n", np.flatnonzero(missing).astype(np.uint16))
+        return ("b", _pack(mask))
+
+    def _decode(self, cont, valid):
+        kind, data = cont
+        if kind == "b": return _unpack(data)
+        mask = np.zeros(_SPAN, bool) if kind == "a" else valid.copy()
+        mask[data] = kind == "a"
+        return mask
+
+    def add(self, seeds, masks):
+        # masks: {(tým, predikát): bool pole délky len(seeds)}; bity těchto seedů se přepíšou, ostatní zůstanou
+        hi = seeds >> 16
+        for c in np.unique(hi):
+            sel = hi == c; off = seeds[sel] & (_SPAN - 1)
+            old_valid = _unpack(self.universe[c]) if c in self.universe else None
+            valid = np.zeros(_SPAN, bool); valid[off] = True
+            if old_valid is not None: valid |= old_valid
+            self.universe[c] = _pack(valid)
+            for key, m in masks.items():
+                mask = np.zeros(_SPAN, bool); mask[off[m[sel]]] = True
+                old = self.bitmaps.setdefault(key, {}).get(c)
+                if old is not None:
+                    keep = self._decode(old, old_valid); keep[off] = False; mask |= keep
+                self.bitmaps[key][c] = self._encode(mask, valid)
+
+    def _matches(self, conds, c):
+        acc = self.universe[c].copy(); valid = None
+        for key, negate in conds:
+            cont = self.bitmaps.get(key, {}).get(c)
+            if cont is None: bits = np.zeros_like(acc)
+            elif cont[0] == "b": bits = cont[1]
+            else:
+                if valid is None: valid = _unpack(self.universe[c])
+                bits = _pack(self._decode(cont, valid))
+            acc &= ~bits if negate else bits
+        return acc
+
+    def query(self, conds, n_examples=0, rng=None):
+        # conds: [((tým, predikát), negace)], všechny musí platit; vrací počet a náhodné ukázkové seedy
+        accs = {c: self._matches(conds, c) for c in sorted(self.universe)}
+        counts = {c: int(_POPCNT8[acc].sum()) for c, acc in accs.items()}
+        total = sum(counts.values())
+        if not n_examples or not total: return total, []
+        rng = rng or np.random.default_rng()
+        picks = np.sort(rng.choice(total, size=min(n_examples, total), replace=False))
+        examples, base = [], 0
+        for c, acc in accs.items():
+            here = picks[(picks >= base) & (picks < base + counts[c])] - base
+            if len(here): examples.extend(int((int(c) << 16) + s) for s in np.flatnonzero(_unpack(acc))[here])
+            base += counts[c]
+        return total, examples
+
+def outcome_predicates(team):
+    g = "A" if team in groups_def["A"] else "B"; other = "B" if g == "A" else "A"
+    return (["Zlato", "Stříbro", "Bronz", "Medaile", "4. místo", "Semifinále", "Čtvrtfinále", "Vypadl ve ČF"]
+            + [f"{k}. ve skupině {g}" for k in range(1, len(groups_def[g]) + 1)]
+            + [f"ČF proti: {o}" for o in groups_def[other]])
+
+def outcome_places(batch):
+    # Umístění v play-off po týmech: 1-4 = medailová místa, 5 = vypadl ve ČF, 0 = nepostoupil ze skupiny;
+    # qf_opp = ID soupeře ve čtvrtfinále (-1 = nehrál)
+    n_g = len(sched); T1, T2 = batch["t1"].astype(np.int64), batch["t2"].astype(np.int64); w1 = batch["s1"] > batch["s2"]
+    W = np.where(w1, T1, T2); L = np.where(w1, T2, T1)
+    n = len(T1); rows = np.arange(n)[:, None]; qf = slice(n_g, n_g + 4)
+    place = np.zeros((n, len(team_list)), np.int8)
+    place[rows, L[:, qf]] = 5
+    for col, code_w, code_l in [(n_g + 6, 3, 4), (n_g + 7, 1, 2)]:
+        place[rows[:, 0], W[:, col]] = code_w; place[rows[:, 0], L[:, col]] = code_l
+    qf_opp = np.full((n, len(team_list)), -1, np.int8)
+    qf_opp[rows, T1[:, qf]] = T2[:, qf]; qf_opp[rows, T2[:, qf]] = T1[:, qf]
+    return place, qf_opp
+
+def _outcome_masks(batch):
+    place, qf_opp = outcome_places(batch)
+    codes = {"Zlato": [1], "Stříbro": [2], "Bronz": [3], "4. místo": [4], "Medaile": [1, 2, 3], "Semifinále": [1, 2, 3, 4], "Vypadl ve ČF": [5]}
+    masks = {}
+    for t in team_list:
+        i = team_idx[t]
+        for p in outcome_predicates(t):
+            if p in codes: masks[(t, p)] = np.isin(place[:, i], codes[p])
+            elif p == "Čtvrtfinále": masks[(t, p)] = qf_opp[:, i] >= 0
+            elif p.startswith("ČF proti: "): masks[(t, p)] = qf_opp[:, i] == team_idx[p[len("ČF proti: "):]]
+            else: masks[(t, p)] = batch["pos"][:, i] == int(p.split(".")[0])
+    return masks
+
+def outcome_index_key(n_sims, powers, db, version):
+    return content_key("index", MODEL_REV, n_sims, powers, db, sched, version)
+
+def load_outcome_index(n_sims, powers, db, version, progress=None):
+    key = outcome_index_key(n_sims, powers, db, version); tp = profiler.start()
+    index = disk_cache_get(key)
+    tp = profiler.lap("index: disk cache", tp)
+    if index is None:
+        # Po novém výsledku se vezme index předchozí banky (_store_parent) a přepíšou se jen turnaje, kterým
+        # _store_patch změnil pořadí ve skupině nebo play-off (na ničem jiném _outcome_masks nezávisí)
+        parent = _store_parent(n_sims, powers, db, version); old = None
+        index = disk_cache_get(outcome_index_key(n_sims, powers, parent, version)) if parent is not None else None
+        if index is not None:
+            try: old = np.load(sim_store_path(n_sims, powers, parent, version), mmap_mode="r")
+            except FileNotFoundError: index = None
+        store = open_sim_store(n_sims, powers, db, version); index = index or OutcomeIndex(); n_g = len(sched)
+        tp = profiler.lap("index: úložiště", tp)
+        for lo in range(1, n_sims + 1, MC_CHUNK):
+            rows = store[lo - 1:lo - 1 + MC_CHUNK]; seeds = np.arange(lo, lo + len(rows))
+            if old is not None:
+                prev = old[lo - 1:lo - 1 + MC_CHUNK]
+                changed = (rows["pos"] != prev["pos"]).any(axis=1)
+                for f in ["t1", "t2", "s1", "s2"]: changed |= (rows["m"][f][:, n_g:] != prev["m"][f][:, n_g:]).any(axis=1)
+                rows, seeds = rows[changed], seeds[changed]; profiler.count("index: přepsané turnaje", len(seeds))
+            batch = store_to_batch(rows, lo); batch["seeds"] = seeds; index.add(seeds, _outcome_masks(batch))
+            if progress: progress(min(lo - 1 + MC_CHUNK, n_sims), n_sims)
+        disk_cache_put(key, index)
+        profiler.lap("index: stavba", tp)
+    return index
+
+# --- DÁVKOVÝ VÝSTUP (simulate.py) ---
+def outcome_columns(batch, matches=False):
+    # Výsledky po seedech jako sloupce (dict jméno -> pole): medailisté, pořadí ve skupině a umístění v play-off
+    # (kódy jako outcome_places); s matches=True i skóre všech zápasů jako celočíselné sloupce "<zápas> s1"/"s2"/"rt"
+    # (kód z rt_codes), v play-off navíc "t1"/"t2" (index v team_list) – bez skládání řetězců, které by brzdilo miliony řádků
+    place, _ = outcome_places(batch); names = np.array(team_list, dtype=object)
+    cols = {"seed": batch["seeds"]}
+    for code, col in enumerate(["Zlato", "Stříbro", "Bronz", "4. místo"], 1):
+        cols[col] = names[(place == code).argmax(axis=1)]
+    for t in team_list: cols[f"skupina {t}"] = batch["pos"][:, team_idx[t]]
+    for t in team_list: cols[f"play-off {t}"] = place[:, team_idx[t]]
+    if matches:
+        labels = [f"{m[1]}-{m[2]}" for m in sched] + po_labels
+        for j, lbl in enumerate(labels):
+            for f in (["t1", "t2"] if j >= len(sched) else []) + ["s1", "s2", "rt"]: cols[f"{lbl} {f}"] = batch[f][:, j]
+    return cols
+
+def simulate_columns(lo, hi, powers, db, version, matches=False):
+    # Jedna úloha pro simulate.py: seedy lo..hi-1, výsledek závisí jen na seedech (stejně jako _store_fill)
+    return outcome_columns(run_tourney_batch(np.arange(lo, hi), powers, db, version), matches)
+
+mc_outcomes = {"QF": ["QF"], "Gold": ["Gold"], "Silver": ["Silver"], "Bronze": ["Bronze"], "Medal": ["Gold", "Silver", "Bronze"]}
+mc_columns = {"🛡️ Postup do ČF": "QF", "🥇 Zlato": "Gold", "🥈 Stříbro": "Silver", "🥉 Bronz": "Bronze", "Celkem medaile": "Medal"}
+
+def wilson_interval(k, n, z=1.96):
+    # 95% Wilsonův interval pro binomický podíl k/n (na rozdíl od normální aproximace funguje i pro k = 0)
+    k = np.asarray(k, dtype=np.float64); p = k / n; den = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / den
+    hw = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / den
+    return center - hw, center + hw
+
+def _mc_counts(res_stats, outcome):
+    return np.array([sum(r[c] for c in mc_outcomes[outcome]) for r in res_stats.values()])
+
+def _mc_precision(res_stats, n, ci_target, rare):
+    # Nejhorší poměr polovina 95% intervalu / požadovaná přesnost přes všechny výsledky (<= 1 = hotovo)
+    worst = 0.0
+    for outcome in mc_outcomes:
+        lo, hi = wilson_interval(_mc_counts(res_stats, outcome), n)
+        worst = max(worst, (hi - lo).max() / 2 / ci_target)
+    for team, outcome in rare:
+        k = sum(res_stats[team][c] for c in mc_outcomes[outcome])
+        lo, hi = wilson_interval(k, n)
+        worst = max(worst, min((hi - lo) / 2 / (MC_RARE_REL * k / n) if k else np.inf, hi / MC_RARE_ABS))
+    return worst
+
+def _mc_goal(n, n_sims, limit, worst):
+    # Odhad potřebného počtu simulací pro průběh úlohy: interval se zužuje jako 1/sqrt(n)
+    return int(min(limit, max(n_sims, n, n * worst ** 2)))
+
+def _mc_new_stats(powers):
+    return {t: {"Gold": 0, "Silver": 0, "Bronze": 0, "QF": 0, "G_Seeds": [], "M_Seeds": []} for t in powers}
+
+def _mc_shard(lo, hi, powers, db, version):
+    # Statistiky sériového enginu pro seedy lo..hi-1; výsledek závisí jen na seedech, ne na tom, kdo shard počítá
+    res_stats = _mc_new_stats(powers)
+    for i in range(lo, hi):
+        tourney = run_tourney(i, powers, db, version)
+        try:
+            qf_matches = [m for m in tourney if "ČF" in m.get("lbl", "")]
+            for m in qf_matches:
+                res_stats[m["t1"]]["QF"] += 1
+                res_stats[m["t2"]]["QF"] += 1
+
+            fin = tourney[-1]; bronz = tourney[-2]
+            gw = fin["w"]; sw = fin["t1"] if fin["w"] == fin["t2"] else fin["t2"]; bw = bronz["w"]
+            res_stats[gw]["Gold"] += 1; res_stats[sw]["Silver"] += 1; res_stats[bw]["Bronze"] += 1
+            res_stats[gw]["G_Seeds"].append(i)
+            for t in [gw, sw, bw]: res_stats[t]["M_Seeds"].append(i)
+        except: pass
+    return res_stats
+
+def _mc_batch_shard(lo, hi, powers, db, version):
+    # Jako _mc_shard, jen batch enginem
+    res_stats = _mc_new_stats(powers)
+    _mc_count_batch(res_stats, run_tourney_batch(np.arange(lo, hi), powers, db, version))
+    return res_stats
+
+def _mc_chunks(fn, args, limit, workers):
+    # (hotovo, fn(lo, hi, *args)) po dávkách MC_CHUNK seedů 1..limit v pořadí seedů. S workers > 1 se v process poolu
+    # počítá o `workers` dávek dopředu; když adaptivní běh přestane číst, rozpočítané dávky se zahodí, takže
+    # výsledek i počet simulací jsou stejné jako sériově (stojí to nejvýš `workers` zbytečných dávek).
+    bounds = [(lo, min(lo + MC_CHUNK, limit + 1)) for lo in range(1, limit + 1, MC_CHUNK)]
+    if workers <= 1:
+        for lo, hi in bounds: yield hi - 1, fn(lo, hi, *args)
+        return
+    pool = _pool(workers); ahead = []
+    try:
+        for lo, hi in bounds:
+            ahead.append((hi - 1, pool.submit(fn, lo, hi, *args)))
+            if len(ahead) > workers:
+                n, fut = ahead.pop(0); yield n, fut.result()
+        for n, fut in ahead: yield n, fut.result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+def _mc_merge(total, part):
+    # Shardy se slučují v pořadí seedů, takže G_Seeds/M_Seeds zůstanou seřazené stejně jako při sériovém běhu
+    for t, r in part.items():
+        for k in ["Gold", "Silver", "Bronze", "QF"]: total[t][k] += r[k]
+        total[t]["G_Seeds"].extend(r["G_Seeds"]); total[t]["M_Seeds"].extend(r["M_Seeds"])
+
+def _mc_shards(n_sims, n_shards):
+    bounds = np.linspace(1, n_sims + 1, n_shards + 1).astype(int)
+    return [(lo, hi) for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo]
+
+def _mc_table(res_stats, n_sims, hw=None, playoffs="sample", exact=False, converged=True):
+    import pandas as pd
+    df = pd.DataFrame.from_dict(res_stats, orient='index')
+    df["🛡️ Postup do ČF"] = (df["QF"] / n_sims * 100)
+    df["🥇 Zlato"] = (df["Gold"] / n_sims * 100); df["🥈 Stříbro"] = (df["Silver"] / n_sims * 100)
+    df["🥉 Bronz"] = (df["Bronze"] / n_sims * 100); df["Celkem medaile"] = ((df["Gold"] + df["Silver"] + df["Bronze"]) / n_sims * 100)
+    for col, outcome in mc_columns.items():
+        if hw is not None: df[f"± {col}"] = hw[outcome] * 100; continue
+        lo, hi = wilson_interval(_mc_counts(res_stats, outcome), n_sims)
+        df[f"± {col}"] = (hi - lo) / 2 * 100
+    df.attrs["n_sims"] = n_sims; df.attrs["playoffs"] = playoffs; df.attrs["exact"] = exact; df.attrs["converged"] = converged
+    return df.sort_values("🥇 Zlato", ascending=False)
+
+def mc_stats(n_sims, powers, db, version, engine=MC_ENGINE, workers=MC_WORKERS, ci_target=None, max_sims=None, rare=(), playoffs="sample", progress=None):
+    # Výsledek je sdílený mezi procesy a restarty přes .sim_cache; klíč = obsah vstupů, ne jejich identita.
+    # playoffs="exact": play-off se nevzorkuje, ale počítá přesně (_mc_exact); bez seedů pro Hledač zázraků.
+    # progress(hotovo, cíl, průběžná tabulka) se volá po každé dávce (JobQueue); v adaptivním režimu je cíl odhad.
+    # Adaptivní běh končí po celé dávce MC_CHUNK podle MC_RARE_*: i ty patří do klíče, jinak by se po jejich změně
+    # vracel výsledek se starým počtem simulací.
+    stop_rule = (MC_CHUNK, MC_RARE_REL, MC_RARE_ABS) if ci_target else None
+    key = content_key("mc", MODEL_REV, n_sims, powers, db, sched, version, engine, ci_target, max_sims, rare, playoffs, stop_rule)
+    tp = profiler.start()
+    cached = disk_cache_get(key)
+    tp = profiler.lap("MC: disk cache", tp)
+    if cached is not None: return cached
+    res_stats = _mc_new_stats(powers); hw = None; exact = False; converged = True
+    if playoffs == "exact":
+        res_stats, n_sims, hw, exact, converged = _mc_exact(n_sims, powers, db, version, ci_target, max_sims, rare, progress, workers)
+    elif ci_target is not None:
+        # Adaptivní režim: aspoň n_sims, pak po dávkách MC_CHUNK, dokud nejsou všechny 95% intervaly
+        # užší než ±ci_target a vzácné výsledky z `rare` [(tým, "Gold"/"Medal"/...)] dost přesné
+        limit = max_sims or MC_MAX_SIMS; n = 0
+        shard = _mc_batch_shard if engine == "batch" else _mc_shard
+        for n, part in _mc_chunks(shard, (powers, db, version), limit, workers):
+            _mc_merge(res_stats, part); worst = _mc_precision(res_stats, n, ci_target, rare)
+            if progress: progress(n, _mc_goal(n, n_sims, limit, worst), _mc_table(res_stats, n))
+            if n >= n_sims and worst <= 1: break
+        n_sims = n; converged = bool(_mc_precision(res_stats, n, ci_target, rare) <= 1)  # False = zastavil strop max_sims
+    elif engine == "batch":
+        store = open_sim_store(n_sims, powers, db, version, workers); index = OutcomeIndex()
+        tp = profiler.lap("MC: úložiště", tp)
+        for lo in range(1, n_sims + 1, MC_CHUNK):
+            batch = store_to_batch(store[lo - 1:lo - 1 + MC_CHUNK], lo)
+            _mc_count_batch(res_stats, batch); index.add(batch["seeds"], _outcome_masks(batch))
+            if progress: progress(lo - 1 + len(batch["seeds"]), n_sims)
+        disk_cache_put(outcome_index_key(n_sims, powers, db, version), index)
+    elif workers > 1:
+        with _pool(workers) as pool:
+            parts = pool.map(_mc_shard, *zip(*[(lo, hi, powers, db, version) for lo, hi in _mc_shards(n_sims, workers * 4)]))
+            for part in parts: _mc_merge(res_stats, part)
+    else:
+        _mc_merge(res_stats, _mc_shard(1, n_sims + 1, powers, db, version))
+    
+    tp = profiler.lap("MC: simulace a agregace", tp)
+    result = (_mc_table(res_stats, n_sims, hw, playoffs, exact, converged), res_stats)
+    disk_cache_put(key, result)
+    profiler.lap("MC: tabulka a zápis", tp)
+    return result
+
+# --- PŘESNÉ PLAY-OFF (dynamické programování přes pavouka) ---
+EXACT_GROUP_ROWS = 50000   # zbývající zápasy skupiny se vyčíslí přesně, jen když vyjde nejvýš tolik větví (~1 zápas)
+EXACT_SEED_PAIRS = 1000000 # ... a nejvýš tolik kombinací výsledků skupin A × B (po sloučení stejných "půlek" nasazení)
+
+def exact_group_stage(powers, db, version, max_rows=EXACT_GROUP_ROWS, mods=None):
+    # Všechna nasazení do play-off, která můžou po zbývajících zápasech skupin nastat, s pravděpodobnostmi:
+    # (řádky playoff_seeding, váhy, poslední hrací den týmů). Skupiny na sobě nezávisí, takže se každá vyčíslí
+    # zvlášť (strom po rozpisu, forma závisí na předchozích výsledcích) a zredukuje na unikátní "půlky" nasazení
+    # (první čtyři a jejich body, rozdíl skóre a góly); zkombinují se až ty a stejná nasazení se sečtou. None, když
+    # by větví v jedné skupině bylo přes max_rows nebo kombinací půlek přes EXACT_SEED_PAIRS: s výchozími mezemi
+    # projde nejvýš jeden zbývající zápas v každé skupině, se dvěma zápasy v jedné skupině už ne.
+    model = outcome_model(powers, mods); frozen = compile_frozen_state(db, version); k = frozen["n"]
+    last = np.array([frozen["last_played"].get(t, -99) for t in team_list]); halves = []
+    for gn in groups_def:
+        S1 = np.zeros((1, len(sched)), np.int16); S2 = np.zeros_like(S1); RT = np.zeros((1, len(sched)), np.int8)
+        S1[:, :k] = [m["s1"] for m in frozen["matches"]]; S2[:, :k] = [m["s2"] for m in frozen["matches"]]
+        RT[:, :k] = [rt_codes.index(m["rt"]) for m in frozen["matches"]]
+        streak = np.array([[frozen["form"].streak(t) for t in team_list]], np.int8); w = np.ones(1); pmfs = {}
+        for i, (d, t1, t2, g) in enumerate(sched[k:], k):
+            if g != gn: continue
+            a, b = team_idx[t1], team_idx[t2]; day = date_mapping[d]
+            fixed = _db_result(db, t1, t2, f"G{gn}")
+            if fixed:
+                S1[:, i], S2[:, i], RT[:, i] = fixed[0], fixed[1], rt_codes.index(fixed[2])
+            else:
+                b1 = match_bucket((day - last[a] == 1) & (day - last[b] > 1), streak[:, a]); b2 = match_bucket((day - last[b] == 1) & (day - last[a] > 1), streak[:, b])
+                keys = match_key(a, b, match_kind(f"G{gn}", day), b1, b2).tolist()
+                for key in set(keys) - pmfs.keys(): pmfs[key] = model.pmf(key)
+                sizes = np.array([len(pmfs[key][0]) for key in keys])
+                if sizes.sum() > max_rows: return None
+                rows = np.repeat(np.arange(len(keys)), sizes)
+                codes = np.concatenate([pmfs[key][0] for key in keys]); p = np.concatenate([pmfs[key][1] for key in keys])
+                S1, S2, RT, streak, w = S1[rows], S2[rows], RT[rows], streak[rows], w[rows] * p
+                S1[:, i], S2[:, i], RT[:, i] = codes // 3 // MAX_GOALS, codes // 3 % MAX_GOALS, codes % 3
+            won = S1[:, i] > S2[:, i]
+            streak[:, a] = _streak_step(streak[:, a], won); streak[:, b] = _streak_step(streak[:, b], ~won)
+            last[a] = last[b] = day
+        # Sloupce druhé skupiny jsou tu nevyplněné, z pořadí se proto bere jen tahle skupina
+        ranks, _, B, D, GF = batch_rankings(S1, S2, RT); top = ranks[gn][:, :4]
+        half, inv = np.unique(np.hstack([top, np.take_along_axis(_seed_key(B, D, GF), top, axis=1)]), axis=0, return_inverse=True)
+        halves.append((half, np.bincount(inv.ravel(), weights=w, minlength=len(half))))
+    (ha, wa), (hb, wb) = halves
+    if len(ha) * len(hb) > EXACT_SEED_PAIRS: return None
+    ia, ib = np.repeat(np.arange(len(ha)), len(hb)), np.tile(np.arange(len(hb)), len(ha))
+    ahead = (ha[ia, 4:] > hb[ib, 4:]) | ((ha[ia, 4:] == hb[ib, 4:]) & (np.arange(4) < 2))
+    # Stejné nasazení se sčítá přes celočíselný kód (jako v _seeding_probs); np.unique po řádcích je mnohem pomalejší
+    pack = lambda X, at: (X.astype(np.int64) << (4 * np.arange(at, at + 4))).sum(axis=1)
+    _, first, inv = np.unique(pack(ha[:, :4], 0)[ia] | pack(hb[:, :4], 4)[ib] | pack(ahead, 8), return_index=True, return_inverse=True)
+    seeding = np.hstack([ha[ia[first], :4], hb[ib[first], :4], ahead[first]])
+    return seeding, np.bincount(inv.ravel(), weights=wa[ia] * wb[ib], minlength=len(first)), last
+
+def playoff_win_matrices(powers, db, last, mods=None):
+    # P(a porazí b) pro všechny dvojice v ČF (únava podle posledního zápasu ve skupině), SF a zápasech o medaile
+    # (předchozí kolo hráli všichni ve stejný den, takže bez únavy). Zápasy play-off zapsané v db mají 0/1.
+    model = outcome_model(powers, mods); n = len(team_list); mats = []
+    cf_day, sf_day, med_day = date_mapping[po_dates[0]], date_mapping[po_dates[4]], date_mapping[po_dates[6]]
+    for day, prev in [(cf_day, np.asarray(last)), (sf_day, np.full(n, cf_day)), (med_day, np.full(n, sf_day))]:
+        rest = day - prev; W = np.zeros((n, n))
+        for a in range(n):
+            for b in range(n):
+                if a == b: continue
+                fixed = _db_result(db, team_list[a], team_list[b], "PO")
+                if fixed: W[a, b] = float(fixed[0] > fixed[1]); continue
+                b1 = match_bucket((rest[a] == 1) & (rest[b] > 1), 0); b2 = match_bucket((rest[b] == 1) & (rest[a] > 1), 0)
+                W[a, b] = model.win_prob(match_key(a, b, match_kind("PO", day), b1, b2))
+        mats.append(W)
+    return mats
+
+def _seed_key(B, D, GF):
+    return B.astype(np.int64) << 20 | (D.astype(np.int64) + 512) << 10 | GF
+
+def playoff_seeding(ranks, B, D, GF):
+    # Nasazení do play-off jako řádek celých čísel: týmy A1..A4, B1..B4 a 4 bity, zda je A_p při přenasazení před
+    # B_p (u stejného místa ve skupině rozhodují body, rozdíl skóre, góly a pak pořadí ČF jako v batch_playoffs).
+    # Nic dalšího play-off neovlivní, takže stejné nasazení = stejné pravděpodobnosti.
+    top = np.hstack([ranks["A"][:, :4], ranks["B"][:, :4]])
+    k = _seed_key(B, D, GF)
+    ka, kb = np.take_along_axis(k, top[:, :4], axis=1), np.take_along_axis(k, top[:, 4:], axis=1)
+    return np.hstack([top, (ka > kb) | ((ka == kb) & (np.arange(4) < 2))])
+
+def playoff_probs(seeding, mats):
+    # Přesné pravděpodobnosti play-off pro každé nasazení (řádek playoff_seeding): 16 kombinací vítězů ČF,
+    # k nim přenasazení, 4 kombinace SF a finále i zápas o bronz analyticky.
+    # Vrací {"QF"/"Gold"/"Silver"/"Bronze": pole řádky × týmy}.
+    Wqf, Wsf, Wmed = mats; n = len(seeding); rows = np.arange(n)
+    A, Bg, ahead = seeding[:, :4], seeding[:, 4:8], seeding[:, 8:].astype(bool)
+    rank = lambda in_a, p: 2 * p + (ahead[:, p] != in_a)   # pořadí při přenasazení (0 = nejlepší)
+    qa = np.stack([A[:, 0], Bg[:, 0], A[:, 1], Bg[:, 1]], axis=1); qb = np.stack([Bg[:, 3], A[:, 3], Bg[:, 2], A[:, 2]], axis=1)
+    ra = np.stack([rank(True, 0), rank(False, 0), rank(True, 1), rank(False, 1)], axis=1)
+    rb = np.stack([rank(False, 3), rank(True, 3), rank(False, 2), rank(True, 2)], axis=1)
+    pq = Wqf[qa, qb]; out = {o: np.zeros((n, len(team_list))) for o in ["QF", "Gold", "Silver", "Bronze"]}
+    out["QF"][rows[:, None], qa] = 1; out["QF"][rows[:, None], qb] = 1
+    for m in range(16):
+        first = (m >> np.arange(4) & 1) == 0
+        W = np.where(first, qa, qb); pr = np.where(first, pq, 1 - pq).prod(axis=1)
+        sf = np.take_along_axis(W, np.argsort(np.where(first, ra, rb), axis=1), axis=1)
+        p1, p2 = Wsf[sf[:, 0], sf[:, 3]], Wsf[sf[:, 1], sf[:, 2]]
+        for (w1, l1, q1), (w2, l2, q2) in itertools.product([(sf[:, 0], sf[:, 3], p1), (sf[:, 3], sf[:, 0], 1 - p1)],
+                                                            [(sf[:, 1], sf[:, 2], p2), (sf[:, 2], sf[:, 1], 1 - p2)]):
+            p = pr * q1 * q2; g = Wmed[w1, w2]; br = Wmed[l1, l2]
+            out["Gold"][rows, w1] += p * g; out["Gold"][rows, w2] += p * (1 - g)
+            out["Silver"][rows, w2] += p * g; out["Silver"][rows, w1] += p * (1 - g)
+            out["Bronze"][rows, l1] += p * br; out["Bronze"][rows, l2] += p * (1 - br)
+    return out
+
+def _seeding_probs(seeding, mats):
+    # Výsledky skupin se stejným nasazením mají stejné pravděpodobnosti play-off: playoff_probs se počítá jen
+    # pro unikátní nasazení (řádově tisíce na 20k simulací); vrací je i s indexem nasazení pro každý řádek
+    codes, first, inv = np.unique((seeding.astype(np.int64) << (4 * np.arange(12))).sum(axis=1), return_index=True, return_inverse=True)
+    profiler.count("play-off: nasazení", len(codes))
+    probs = playoff_probs(seeding[first], mats)
+    probs["Medal"] = probs["Gold"] + probs["Silver"] + probs["Bronze"]
+    return probs, inv.ravel()
+
+def _playoff_unique(S1, S2, RT, mats):
+    ranks, _, B, D, GF = batch_rankings(S1, S2, RT)
+    return _seeding_probs(playoff_seeding(ranks, B, D, GF), mats)
+
+def _playoff_expect(seeding, w, mats):
+    probs, inv = _seeding_probs(seeding, mats)
+    return probs, np.bincount(inv, weights=w, minlength=len(probs["QF"]))
+
+def _group_stage_last():
+    # Poslední hrací den týmů ve skupině (jako `last` z batch_group_stage): plyne z rozpisu, ne z výsledků
+    last = {}
+    for d, t1, t2, g in sched: last[t1] = last[t2] = date_mapping[d]
+    return np.array([last.get(t, -99) for t in team_list])
+
+def _mc_exact_shard(lo, hi, powers, db, version, mats):
+    # Očekávané výsledky play-off pro unikátní nasazení ze seedů lo..hi-1 a kolikrát které nasazení padlo
+    S1, S2, RT, _ = batch_group_stage(np.arange(lo, hi), powers, db, version)
+    probs, inv = _playoff_unique(S1, S2, RT, mats)
+    return probs, np.bincount(inv, minlength=len(probs["QF"]))
+
+def _mc_exact(n_sims, powers, db, version, ci_target, max_sims, rare, progress=None, workers=1):
+    # mc_stats(playoffs="exact"): skupiny se vzorkují jako v batch enginu (nebo vyčíslí přesně, když zbývá málo
+    # zápasů) a play-off se ke každému výsledku dopočítá přesně, takže v odhadu nezůstává šum z play-off.
+    # Počty v res_stats jsou očekávané hodnoty, G_Seeds/M_Seeds zůstávají prázdné; vrací i polovinu 95% intervalu
+    # a zda se dosáhlo ci_target (False = zastavil strop max_sims).
+    # Banku simulací (open_sim_store, opravuje se po novém výsledku) nečte: má jen MC_SIMS seedů, adaptivní běh jich
+    # potřebuje typicky 4x víc (se vzácnými výsledky až MC_MAX_SIMS, to by banka přerostla CACHE_MAX_BYTES) a na 40k
+    # simulací připadá ~0.27 s na skupiny, ~0.20 s na pořadí a ~0.07 s na play-off. Z banky by šlo vzít jen první
+    # čtvrtinu skupin a pořadí, tedy ~0.12 s z ~0.55 s.
+    n_t = len(team_list); s = {o: np.zeros(n_t) for o in mc_outcomes}; sq = {o: np.zeros(n_t) for o in mc_outcomes}
+    def add(probs, w):
+        for o in mc_outcomes: s[o] += w @ probs[o]; sq[o] += w @ probs[o] ** 2
+    half_width = lambda o, n: 1.96 * np.sqrt(np.maximum(sq[o] / n - (s[o] / n) ** 2, 0) / n)
+    def precision(n):
+        # Jako _mc_precision, jen s normálním intervalem z rozptylu pravděpodobností po simulacích
+        if ci_target is None: return 0.0
+        worst = max(half_width(o, n).max() / ci_target for o in mc_outcomes)
+        for t, o in rare:
+            k = s[o][team_idx[t]]; h = half_width(o, n)[team_idx[t]]
+            worst = max(worst, min(h / (MC_RARE_REL * k / n) if k > 0 else np.inf, (k / n + h) / MC_RARE_ABS))
+        return worst
+    def snapshot(n, n_out, hw):
+        res_stats = _mc_new_stats(powers)
+        for t, r in res_stats.items():
+            for o in ["QF", "Gold", "Silver", "Bronze"]: r[o] = float(s[o][team_idx[t]] / n * n_out)
+        return res_stats, {o: np.array([h[team_idx[t]] for t in res_stats]) for o, h in hw.items()}
+
+    exact = exact_group_stage(powers, db, version)
+    if exact is not None:
+        seeding, w, last = exact
+        add(*_playoff_expect(seeding, w, playoff_win_matrices(powers, db, last))); n = 1
+        hw = {o: np.zeros(n_t) for o in mc_outcomes}; converged = True
+    else:
+        limit = (max_sims or MC_MAX_SIMS) if ci_target is not None else n_sims; n = 0
+        mats = playoff_win_matrices(powers, db, _group_stage_last())
+        for n, part in _mc_chunks(_mc_exact_shard, (powers, db, version, mats), limit, workers):
+            add(*part); worst = precision(n)
+            if progress:
+                rs, h = snapshot(n, n, {o: half_width(o, n) for o in mc_outcomes})
+                progress(n, _mc_goal(n, n_sims, limit, worst), _mc_table(rs, n, h, "exact"))
+            if n >= n_sims and worst <= 1: break
+        n_sims = n; hw = {o: half_width(o, n) for o in mc_outcomes}; converged = bool(precision(n) <= 1)
+    res_stats, hw = snapshot(n, n_sims, hw)
+    return res_stats, n_sims, hw, exact is not None, converged
+
+# --- CO KDYBY (scénáře se společnými náhodnými čísly) ---
+WHATIF_PARAMS = {"host": "Bonus domácích", "tired": "Únava", "form": "Forma (±)"}
+
+def whatif_grid(axis, values, powers=team_powers_db):
+    # Scénáře pro whatif_sweep jako [(hodnota, síly, modifikátory)]. axis = (tým, "OFF"/"DEF"/"SKILL"): hodnota se
+    # přičte k síle týmu; axis = ("mods", "host"/"tired"): hodnota modifikátoru; ("mods", "form"): s -> (1-s, 1, 1+s)
+    who, field = axis; out = []
+    for v in values:
+        if who == "mods":
+            out.append((v, powers, {field: (1 - v, 1.0, 1 + v) if field == "form" else v}))
+        else:
+            p = {t: dict(r) for t, r in powers.items()}; p[who][field] = max(1, p[who][field] + v)
+            out.append((v, p, None))
+    return out
+
+def whatif_sweep(scenarios, n_sims, db, version, powers=team_powers_db, progress=None):
+    # Všechny scénáře i výchozí model se hrají se stejnými seedy 1..n a stejným u pro každý zápas, vzorkovaným
+    # monotónně (sample_coupled), play-off přesně. Rozdíl proti výchozímu modelu je tak párový: jeho rozptyl je
+    # mnohem menší než rozdíl dvou nezávislých běhů. Když zbývá málo zápasů, počítá se vše přesně (exact_group_stage).
+    # Vrací dlouhou tabulku Scénář × Tým s % podle mc_columns, "Δ ..." proti výchozímu modelu a "± Δ ..." (95 %).
+    import pandas as pd
+    runs = [(None, powers, None)] + list(scenarios); outs = list(mc_outcomes)
+    s = np.zeros((len(runs), len(outs), len(team_list))); d = np.zeros_like(s); dq = np.zeros_like(s)
+    # Přesně jen tehdy, když to vyjde pro všechny scénáře (meze výčtu závisí i na silách a modifikátorech);
+    # jinak se vzorkuje všechno, aby párové rozdíly nemíchaly přesné a vzorkované hodnoty
+    exact = [exact_group_stage(p, db, version, mods=mods) for _, p, mods in runs[:1]]
+    if exact[0] is not None: exact += [exact_group_stage(p, db, version, mods=mods) for _, p, mods in runs[1:]]
+    is_exact = all(e is not None for e in exact)
+    if is_exact:
+        for r, ((_, p, mods), (seeding, w, last)) in enumerate(zip(runs, exact)):
+            probs, w = _playoff_expect(seeding, w, playoff_win_matrices(p, db, last, mods))
+            s[r] = [w @ probs[o] for o in outs]
+        d = s - s[0]; n = 1
+    else:
+        n = 0; mats = [None] * len(runs)
+        while n < n_sims:
+            hi = min(n + MC_CHUNK, n_sims); seeds = np.arange(n + 1, hi + 1)
+            for r, (_, p, mods) in enumerate(runs):
+                S1, S2, RT, last = batch_group_stage(seeds, p, db, version, mods, coupled=True)
+                if mats[r] is None: mats[r] = playoff_win_matrices(p, db, last, mods)
+                probs, inv = _playoff_unique(S1, S2, RT, mats[r])
+                x = np.stack([probs[o][inv] for o in outs])   # výsledky × simulace × týmy
+                if r == 0: x0 = x
+                s[r] += x.sum(axis=1); d[r] += (x - x0).sum(axis=1); dq[r] += ((x - x0) ** 2).sum(axis=1)
+                if progress: progress(n * len(runs) + (r + 1) * (hi - n), n_sims * len(runs))
+            n = hi
+    hw = 1.96 * np.sqrt(np.maximum(dq / n - (d / n) ** 2, 0) / n)
+    rows = []
+    for r, (label, _, _) in enumerate(runs[1:], 1):
+        for i, t in enumerate(team_list):
+            row = {"Scénář": label, "Tým": t}
+            for j, col in enumerate(mc_columns):
+                row[col] = s[r, j, i] / n * 100; row[f"Δ {col}"] = d[r, j, i] / n * 100; row[f"± Δ {col}"] = hw[r, j, i] * 100
+            rows.append(row)
+    df = pd.DataFrame(rows); df.attrs["n_sims"] = n; df.attrs["exact"] = is_exact
+    return df
+
+def whatif_sensitivity(df, column="Celkem medaile"):
+    # Týmy × scénáře: změna metriky proti výchozímu modelu (p. b.) a sklon přímky proložené změnami
+    # (p. b. na jednotku parametru), seřazeno podle velikosti sklonu. Sloupce scénářů jsou texty ("-10", "1.05"):
+    # se "Sklon" by jinak tabulka měla názvy sloupců smíšeného typu, které st.dataframe (Arrow) neumí
+    t = df.pivot(index="Tým", columns="Scénář", values=f"Δ {column}")
+    x = t.columns.to_numpy(dtype=np.float64)
+    slope = np.polyfit(x, t.to_numpy().T, 1)[0] if len(x) > 1 else np.nan
+    t.columns = [f"{v:g}" for v in x]; t["Sklon"] = slope
+    return t.sort_values("Sklon", key=abs, ascending=False)
+
+# --- ÚLOHY NA POZADÍ (sdílené mezi sezeními aplikace) ---
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    # Jedna úloha JobQueue: future s výsledkem, průběh (hotovo, cíl) a poslední průběžný výsledek. owners = místa
+    # na stránkách sezení, která úlohu zobrazují; když je všechna převezmou jiné úlohy (výběr se změnil), úloha se
+    # zruší: ve frontě hned, rozběhnutá při dalším report() (JobCancelled), a uvolní vlákno pro ostatní.
+    # Hodiny se nehlídají: prohlížeč v pozadí zpomaluje překreslování a dlouhý výpočet by se zastavoval zbytečně.
+    # profiler měří jen tuto úlohu (debug panel aplikace ho ukazuje u úloh stránky).
+    def __init__(self):
+        self.future = None; self.progress = (0, 0); self.partial = None; self.owners = set(); self.cancelled = False
+        self.profiler = Profiler()
+
+    def run(self, fn, args, kwargs):
+        # V novém prázdném kontextu: profiler úlohy nezůstane nastavený dalším úlohám stejného vlákna poolu
+        def body():
+            use_profiler(self.profiler)
+            return fn(*args, progress=self.report, **kwargs)
+        return contextvars.Context().run(body)
+
+    def cancel(self):
+        self.cancelled = True; self.future.cancel()
+
+    def report(self, done, goal, partial=None):
+        if self.cancelled: raise JobCancelled()
+        self.progress = (done, goal)
+        if partial is not None: self.partial = partial
+
+    def done(self):
+        return self.future.done()
+
+    def stopped(self):
+        # Zastavení přes report() nebo zrušení ve frontě (ne chyba výpočtu); JobQueue.submit takovou úlohu spustí znovu
+        return self.done() and (self.future.cancelled() or isinstance(self.future.exception(), JobCancelled))
+
+    def error(self):
+        # Výjimka, se kterou výpočet skončil (None = bez chyby); taková úloha se znovu nespouští, jinak by se
+        # deterministická chyba počítala pořád dokola a stránka by ji nikdy neukázala
+        return None if not self.done() or self.stopped() else self.future.exception()
+
+    def result(self):
+        return self.future.result()
+
+class JobQueue:
+    # Výpočty (mc_stats, load_outcome_index, group_outlook) běží v poolu vláken mimo běh stránky. Stejná úloha
+    # (funkce + obsah argumentů) se počítá jen jednou: další sezení dostane rozběhnutou nebo hotovou úlohu.
+    # Funkce musí brát progress=callback; zastavená úloha se při dalším submit spustí znovu, chyba (Job.error) zůstane.
+    # owner = místo na stránce jednoho sezení (např. (id sezení, "prediktor")): nová úloha pro stejného vlastníka
+    # předchozí úlohu přebírá, a pokud ji už nikdo jiný nezobrazuje, zruší ji (Job.cancel). Úloha bez vlastníka
+    # nebo s vlastníkem, který jen zavřel stránku, doběhne a zůstane hotová pro další sezení.
+    def __init__(self, workers=JOB_WORKERS):
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="mc-job"); self.jobs = {}; self.owned = {}
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args, owner=None, **kwargs):
+        key = content_key(fn.__name__, args, kwargs)
+        with self.lock:
+            job = self.jobs.get(key)
+            if job is None or job.cancelled or job.stopped():
+                job = Job(); job.future = self.pool.submit(job.run, fn, args, kwargs)
+                self.jobs.pop(key, None); self.jobs[key] = job
+                done = [k for k, j in self.jobs.items() if j.done()]
+                for k in done[:max(0, len(self.jobs) - JOB_KEEP)]: del self.jobs[k]
+            if owner is not None:
+                prev = self.owned.get(owner)
+                if prev is not None and prev is not job:
+                    prev.owners.discard(owner)
+                    if not prev.owners and not prev.done(): prev.cancel()
+                job.owners.add(owner); self.owned[owner] = job
+                for o in [o for o, j in self.owned.items() if j.done()]: del self.owned[o]
+            return job
+
+# --- ŘEŠIČ POSTUPU (přesný výčet zbývajících zápasů skupiny) ---
+# Třídy výsledku pro t1: výhra REG, výhra PP/SN, prohra PP/SN, prohra REG. PP a SN jsou pro pořadí totéž
+# (stejné body, rozdíl skóre vždy 1), takže stačí 4 třídy místo 6.
+GAME_CLASSES = [(3, 0), (2, 1), (1, 2), (0, 3)]
+TIE_BIG = 99            # "libovolně vysoký" rozdíl skóre / počet gólů v minitabulce
+TIE_BUDGET = 20000      # nejvíc zkoušených kombinací skóre na jednu shodu; nad tím se bere každé pořadí jako možné
+SOLVER_BUDGET = 150000  # nejvíc stavů na tým; nad tím (začátek turnaje) jen bezpečné meze z bodů, viz group_outlook
+SOLVER_ESTIMATE = 20_000_000   # odhad stavů (_solver_estimate), nad kterým se výčet ani nezkouší
+
+def _tie_ranks(Q, T, played, rem, classes):
+    # Možná umístění T uvnitř skupiny Q týmů se stejným počtem bodů (0 = první), pravidla jako solve_tie
+    # v get_iihf_rankings: body, rozdíl skóre a vstřelené góly ze vzájemných zápasů, pak pořadí ve skupině.
+    mB, mD, mGF = dict.fromkeys(Q, 0), dict.fromkeys(Q, 0), dict.fromkeys(Q, 0)
+    for a, b, s1, s2, p1, p2 in played:
+        if a in Q and b in Q: mB[a] += p1; mB[b] += p2; mD[a] += s1 - s2; mD[b] += s2 - s1; mGF[a] += s1; mGF[b] += s2
+    games = []
+    for (a, b), c in zip(rem, classes):
+        if a in Q and b in Q:
+            mB[a] += GAME_CLASSES[c][0]; mB[b] += GAME_CLASSES[c][1]
+            games.append((a, b, c in (0, 3)) if c < 2 else (b, a, c in (0, 3)))
+    higher = sum(mB[x] > mB[T] for x in Q); sub = sorted(x for x in Q if mB[x] == mB[T])
+    if len(sub) == 1: return {higher}
+
+    # Rozhoduje skóre: rozdíly v REG zápasech 1..cap nebo "libovolně vysoký", v PP/SN vždy 1; góly poraženého
+    # přidávají oběma stejně a zkouší se, jen když se T shoduje s někým i v rozdílu skóre
+    games = [(w, l, reg) for w, l, reg in games if w in sub or l in sub]
+    cap = max(mD[x] for x in sub) - min(mD[x] for x in sub) + 2
+    g_cap = max(mGF[x] for x in sub) - min(mGF[x] for x in sub) + 1
+    margins = [list(range(1, cap + 1)) + [TIE_BIG] if reg else [1] for _, _, reg in games]
+    if math.prod(map(len, margins)) * (g_cap + 2) ** len(games) > TIE_BUDGET:
+        return set(range(higher, higher + len(sub)))
+    ranks = set()
+    for ms in itertools.product(*margins):
+        D, GF = {x: mD[x] for x in sub}, {x: mGF[x] for x in sub}
+        for (w, l, _), m in zip(games, ms):
+            if w in D: D[w] += m; GF[w] += m
+            if l in D: D[l] -= m
+        goals = itertools.product(list(range(g_cap + 1)) + [TIE_BIG], repeat=len(games)) if sum(D[x] == D[T] for x in sub) > 1 else [()]
+        for ls in goals:
+            G = dict(GF)
+            for (w, l, _), g in zip(games, ls):
+                if w in G: G[w] += g
+                if l in G: G[l] += g
+            ranks.add(higher + sum(D[x] > D[T] or (D[x] == D[T] and (G[x], -x) > (G[T], -T)) for x in sub))
+            if len(ranks) == len(sub): return ranks
+    return ranks
+
+def _elimination_order(games, rem, skip):
+    # Pořadí zápasů, ve kterém týmy co nejdřív odehrají vše (pak se jejich stav smrskne na nad/stejně/pod)
+    order, pending = [], list(games)
+    while pending:
+        cnt = {}
+        for k in pending:
+            for x in rem[k]:
+                if x != skip: cnt[x] = cnt.get(x, 0) + 1
+        x = min(cnt, key=cnt.get)
+        order += [k for k in pending if x in rem[k]]; pending = [k for k in pending if x not in rem[k]]
+    return order
+
+def group_outlook(gn, db, progress=None):
+    # Pro každý tým skupiny {"possible": pořadí, kterých ještě může dosáhnout, "exact": bool}; co v possible
+    # není, nastat nemůže (jistota postupu / vyřazení). Počítá se přes všechny výsledky zbývajících zápasů.
+    # Když je zbývajících zápasů moc (odhad nad SOLVER_ESTIMATE nebo víc než SOLVER_BUDGET stavů, začátek turnaje),
+    # vrátí se jen meze z bodů (exact=False): nad T jen ti, kdo už mají víc, než T může mít, pod T jen ti, kdo T
+    # už nedoženou. Nad odhadem se meze vrací hned, bez výčtu až do vyčerpání SOLVER_BUDGET.
+    teams = groups_def[gn]; n = len(teams); played, rem = [], []
+    pts0 = [0] * n
+    for d, t1, t2, g in sched:
+        if g != gn: continue
+        a, b = teams.index(t1), teams.index(t2); res = _db_result(db, t1, t2, f"G{gn}")
+        if res is None: rem.append((a, b)); continue
+        s1, s2, rt = res; c = (0 if rt == "REG" else 1) if s1 > s2 else (3 if rt == "REG" else 2)
+        played.append((a, b, s1, s2) + GAME_CLASSES[c]); pts0[a] += GAME_CLASSES[c][0]; pts0[b] += GAME_CLASSES[c][1]
+
+    outlook = {}; max_pts = [pts0[x] + 3 * sum(x in g for g in rem) for x in range(n)]; tp = profiler.start()
+    for T in range(n):
+        best = 1 + sum(pts0[x] > max_pts[T] for x in range(n) if x != T)
+        worst = n - sum(max_pts[x] < pts0[T] for x in range(n) if x != T)
+        try:
+            if _solver_estimate(T, pts0, rem) > SOLVER_ESTIMATE: raise _OverBudget
+            outlook[teams[T]] = {"possible": _team_positions(T, pts0, rem, played, set(range(best, worst + 1))), "exact": True}
+        except _OverBudget: outlook[teams[T]] = {"possible": list(range(best, worst + 1)), "exact": False}
+        if progress: progress(T + 1, n)
+    profiler.lap("řešič postupu", tp)
+    return outlook
+
+class _OverBudget(Exception):
+    pass
+
+def _solver_estimate(T, pts0, rem):
+    # Odhad práce _team_positions předem, bez výčtu: pro každé P a každý krok nejvýš 4^(odehrané zápasy) stavů,
+    # nejvýš ale součin možných hodnot týmů (3g + 1 po g zápasech, po posledním zápasu jen pod/rovno/nad P).
+    # Nepočítá s předčasným koncem ani se splýváním stavů, takže je to jen hrubé měřítko: výčty, které se do
+    # SOLVER_BUDGET vejdou, měly na zkoušených turnajích odhad nejvýš ~1.9·10^7, začátek turnaje 2–7·10^7.
+    n = len(pts0); own = sum(T in g for g in rem)
+    others = _elimination_order([k for k in range(len(rem)) if T not in rem[k]], rem, T)
+    games_left = [sum(x in rem[k] for k in others) for x in range(n)]; total = 0
+    for P in range(pts0[T], pts0[T] + 3 * own + 1):
+        g = [0] * n
+        for j, k in enumerate(others):
+            for x in rem[k]: g[x] += 1
+            b = 1
+            for x in range(n):
+                if x != T: b *= min(3 if g[x] == games_left[x] > 0 else 3 * g[x] + 1, P - pts0[x] + 3 if pts0[x] <= P else 1)
+            total += min(4 ** (own + j + 1), b)
+            if total > SOLVER_ESTIMATE: return total
+    return total
+
+def _team_positions(T, pts0, rem, played, bounds):
+    # Pro každý možný konečný počet bodů P týmu T se po zápasech ostatních nese množina stavů: body oříznuté na
+    # P + 1 (už jsou nad T) a -1 (už T nedoženou), takže různé cesty ke stejnému stavu splynou. Stav je zabalený
+    # do int64 (6 bitů na tým) a jeden zápas = jeden krok nad celou množinou. Shody bodů s T se dořeší cíleným
+    # prohledáním (_tie_scenarios) jen u kombinací, které nastat mohou. Končí se, jakmile jsou možná všechna
+    # pořadí z mezí `bounds` (víc jich být nemůže).
+    n = len(pts0); work = 0; shift = 6 * np.arange(n, dtype=np.int64)
+    own = [k for k in range(len(rem)) if T in rem[k]]
+    others = _elimination_order([k for k in range(len(rem)) if T not in rem[k]], rem, T)
+    left = np.array([[3 * sum(x in rem[k] for k in others[j:]) for x in range(n)] for j in range(len(others) + 1)])
+    combos = np.array(list(itertools.product(range(4), repeat=len(own))), dtype=np.int64).reshape(4 ** len(own), len(own))
+    pts = np.tile(np.array(pts0, dtype=np.int64), (len(combos), 1))
+    for i, k in enumerate(own):
+        pts[:, rem[k][0]] += np.array([3, 2, 1, 0])[combos[:, i]]; pts[:, rem[k][1]] += np.array([0, 1, 2, 3])[combos[:, i]]
+    clip = lambda v, P, lim: np.where(v > P, P + 1, np.where(v + lim < P, -1, v))
+
+    possible, pending = set(), set()
+    Ps = sorted(set(pts[:, T].tolist()), key=lambda P: min(P - pts[:, T].min(), pts[:, T].max() - P))   # krajní P první
+    for P in Ps:
+        v = clip(pts[pts[:, T] == P], P, left[0]); v[:, T] = P
+        states = np.unique(((v + 1) << shift).sum(axis=1))
+        for j, k in enumerate(others):
+            a, b = rem[k]; va = (states >> shift[a] & 63) - 1; vb = (states >> shift[b] & 63) - 1
+            live_a = (va >= 0) & (va <= P); live_b = (vb >= 0) & (vb <= P); nxt = []
+            for p1, p2 in GAME_CLASSES:
+                na = np.where(live_a, clip(va + p1, P, left[j + 1][a]), va); nb = np.where(live_b, clip(vb + p2, P, left[j + 1][b]), vb)
+                nxt.append(states + ((na - va) << shift[a]) + ((nb - vb) << shift[b]))
+            states = np.unique(np.concatenate(nxt)); work += len(states)
+            if work > SOLVER_BUDGET: raise _OverBudget
+        v = (states[:, None] >> shift & 63) - 1
+        bits = 1 << np.arange(n, dtype=np.int64); above = ((v > P) * bits).sum(axis=1); tie = ((v == P) * bits).sum(axis=1) & ~(1 << T)
+        for ab, ti in set(zip(above.tolist(), tie.tolist())):
+            if ti: pending.add((P, ab, ti))
+            else: possible.add(bin(ab).count("1") + 1)
+        if possible >= bounds: return sorted(possible)
+    for P, above, tie in sorted(pending):
+        top = bin(above).count("1") + 1; Q = {T} | {x for x in range(n) if tie >> x & 1}
+        if set(range(top, top + len(Q))) <= possible: continue
+        possible |= {top + r for r in _tie_scenarios(T, Q, P, above, pts0, rem, played)}
+        if possible >= bounds: break
+    return sorted(possible)
+
+def _tie_scenarios(T, Q, P, above, pts0, rem, played):
+    # Všechna rozložení vzájemných zápasů v Q, se kterými může T skončit na P bodech, týmy z Q stejně a přesně
+    # týmy z `above` výš; pro každé se spočtou možná umístění T (_tie_ranks). Stav jako v _team_positions
+    # (5 bitů na tým) a k tomu 2 bity na třídu výsledku každého vzájemného zápasu. Když se stav do int64
+    # nevejde nebo je stavů přes SOLVER_BUDGET, bere se každé umístění ve shodě jako možné.
+    n = len(pts0); order = _elimination_order(range(len(rem)), rem, None)
+    left = np.array([[3 * sum(x in rem[k] for k in order[j:]) for x in range(n)] for j in range(len(order) + 1)])
+    inner = [k for k in order if rem[k][0] in Q and rem[k][1] in Q]
+    if 5 * n + 2 * len(inner) > 63: return set(range(len(Q)))
+    shift = 5 * np.arange(n, dtype=np.int64)
+
+    def settle(x, v, lim):
+        # Body týmu x po zápase (pole přes stavy): -2 = scénář už neplatí, -1 = tým je bezpečně na své straně
+        if x in Q: return np.where((v > P) | (v + lim < P), -2, v)
+        if above >> x & 1: return np.where(v > P, -1, np.where(v + lim <= P, -2, v))
+        return np.where(v >= P, -2, np.where(v + lim < P, -1, v))
+
+    v0 = np.array([int(settle(x, np.int64(pts0[x]), left[0][x])) for x in range(n)])
+    if (v0 == -2).any(): return set()
+    states = np.array([((v0 + 1) << shift).sum()], dtype=np.int64); work = 0
+    for j, k in enumerate(order):
+        a, b = rem[k]; va = (states >> shift[a] & 31) - 1; vb = (states >> shift[b] & 31) - 1; nxt = []
+        for c, (p1, p2) in enumerate(GAME_CLASSES):
+            na = np.where(va >= 0, settle(a, va + p1, left[j + 1][a]), va); nb = np.where(vb >= 0, settle(b, vb + p2, left[j + 1][b]), vb)
+            ok = (na != -2) & (nb != -2)
+            s = states[ok] + ((na[ok] - va[ok]) << shift[a]) + ((nb[ok] - vb[ok]) << shift[b])
+            if k in inner: s = s | (c << (5 * n + 2 * inner.index(k)))
+            nxt.append(s)
+        states = np.unique(np.concatenate(nxt)); work += len(states)
+        if work > SOLVER_BUDGET: return set(range(len(Q)))
+    ranks = set()
+    for sig in np.unique(states >> (5 * n)).tolist():
+        classes = [0] * len(rem)
+        for i, k in enumerate(inner): classes[k] = sig >> (2 * i) & 3
+        ranks |= _tie_ranks(Q, T, played, rem, classes)
+        if len(ranks) == len(Q): break
+    return ranks
@@ -0,0 +1,61 @@
+# Dávkové simulace bez Streamlitu: výsledky po seedech se po blocích zapisují do CSV/Parquet,
+# v paměti je vždy jen několik bloků po --chunk turnajích.
+#   python simulate.py -n 2000000 -o vysledky.parquet --workers 8
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from engine import APP_VERSION, MC_CHUNK, team_powers_db, results_db, simulate_columns, team_list
+
+def iter_chunks(start, n_sims, chunk, workers, matches):
+    bounds = [(lo, min(lo + chunk, start + n_sims)) for lo in range(start, start + n_sims, chunk)]
+    args = lambda lo, hi: (lo, hi, team_powers_db, results_db, APP_VERSION, matches)
+    if workers <= 1:
+        for lo, hi in bounds: yield simulate_columns(*args(lo, hi))
+        return
+    # Nejvýš 2 rozpracované bloky na workera; bloky se vrací v pořadí seedů
+    with ProcessPoolExecutor(workers) as pool:
+        pending = []
+        for lo, hi in bounds:
+            pending.append(pool.submit(simulate_columns, *args(lo, hi)))
+            if len(pending) >= 2 * workers: yield pending.pop(0).result()
+        for f in pending: yield f.result()
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Monte Carlo simulace MS 2026 do CSV/Parquet")
+    ap.add_argument("-n", "--sims", type=int, default=1000000, help="počet simulací (seedy start..start+n-1)")
+    ap.add_argument("-o", "--out", required=True, help="výstupní soubor .csv nebo .parquet")
+    ap.add_argument("--start", type=int, default=1, help="první seed (stejný seed = stejný turnaj jako v aplikaci)")
+    ap.add_argument("--chunk", type=int, default=MC_CHUNK, help="turnajů v jednom bloku")
+    ap.add_argument("--workers", type=int, default=1, help="počet procesů")
+    ap.add_argument("--format", choices=["csv", "parquet"], help="jinak podle přípony souboru")
+    ap.add_argument("--matches", action="store_true", help="přidat skóre všech 64 zápasů (56 ve skupinách, 8 v play-off); rt: 0 = REG, 1 = PP, 2 = SN")
+    a = ap.parse_args(argv)
+    fmt = a.format or ("parquet" if a.out.endswith(".parquet") else "csv")
+
+    import pandas as pd
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            ap.error("zápis do Parquetu potřebuje pyarrow (pip install pyarrow)")
+    writer = None; done = 0; t0 = time.time()
+    for cols in iter_chunks(a.start, a.sims, a.chunk, a.workers, a.matches):
+        df = pd.DataFrame(cols)
+        # Týmy v play-off jako kategorie (v Parquetu slovník, v CSV jména), skóre a typ výsledku zůstávají čísla
+        for c in df.columns:
+            if c.endswith((" t1", " t2")): df[c] = pd.Categorical.from_codes(df[c], team_list)
+        if fmt == "parquet":
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if writer is None: writer = pq.ParquetWriter(a.out, table.schema)
+            writer.write_table(table)
+        else:
+            df.to_csv(a.out, mode="w" if done == 0 else "a", header=done == 0, index=False)
+        done += len(df)
+        print(f"\r{done:,}/{a.sims:,} simulací ({done / (time.time() - t0):,.0f}/s)".replace(",", " "), end="", file=sys.stderr)
+    if writer is not None: writer.close()
+    print(file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
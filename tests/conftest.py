@@ -0,0 +1,4 @@
+# Testy importují engine z kořene repozitáře, takže běží i jako `pytest` bez instalace
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,57 @@
+# Přesné play-off (_mc_exact): playoff_probs pro pevné nasazení proti vzorkovanému batch_playoffs a vyčíslení
+# skupin po jedné (exact_group_stage) proti společnému výčtu obou zbývajících zápasů.
+#   python -m pytest tests
+import numpy as np
+import pytest
+from engine import (MAX_GOALS, _seed_key, batch_group_stage, batch_playoffs, batch_rankings, compile_frozen_state, date_mapping,
+                    exact_group_stage, match_bucket, match_key, match_kind, outcome_model, playoff_probs, playoff_seeding,
+                    playoff_win_matrices, results_db, rt_codes, run_tourney, sched, team_idx, team_list, team_powers_db)
+
+N = 40000   # vzorkovaných play-off na nasazení
+Z = 4.5     # povolená odchylka četnosti v násobcích směrodatné chyby
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_playoff_probs_match_sampled_playoffs(seed):
+    # Skupiny z jednoho turnaje, play-off se pak zahraje N-krát s různými seedy
+    S1, S2, RT, last = batch_group_stage(np.array([seed]), team_powers_db, results_db, 1)
+    ranks, pos, B, D, GF = batch_rankings(S1, S2, RT)
+    probs = playoff_probs(playoff_seeding(ranks, B, D, GF), playoff_win_matrices(team_powers_db, results_db, last))
+    rep = lambda X: np.repeat(X, N, axis=0)
+    T1, T2, P1, P2, _ = batch_playoffs(np.arange(1, N + 1), team_powers_db, results_db, {g: rep(r) for g, r in ranks.items()},
+                                       rep(pos), rep(_seed_key(B, D, GF)), last)
+    won = P1 > P2; W, L = np.where(won, T1, T2), np.where(won, T2, T1)
+    sampled = {"QF": np.hstack([T1[:, :4], T2[:, :4]]), "Gold": W[:, 7], "Silver": L[:, 7], "Bronze": W[:, 6]}
+    for o, teams in sampled.items():
+        freq = np.bincount(teams.ravel(), minlength=len(team_list)) / N; p = probs[o][0]
+        assert (np.abs(freq - p) <= Z * np.sqrt(p * (1 - p) / N) + 1e-12).all(), o
+
+def pack(seeding):
+    # Řádek nasazení jako jedno číslo (4 bity na položku), stejné nasazení = stejný kód
+    return (seeding.astype(np.int64) << (4 * np.arange(seeding.shape[1]))).sum(axis=1)
+
+def joint_seedings(db):
+    # Společný výčet zbývajících zápasů (po jednom v každé skupině): všechny kombinace výsledků obou zápasů
+    model = outcome_model(team_powers_db); frozen = compile_frozen_state(db, 1); k = frozen["n"]
+    last = {t: frozen["last_played"].get(t, -99) for t in team_list}; codes, p = [], []
+    for d, t1, t2, g in sched[k:]:
+        day = date_mapping[d]; s1, s2 = frozen["form"].streak(t1), frozen["form"].streak(t2)
+        b1 = match_bucket(day - last[t1] == 1 and day - last[t2] > 1, np.array(s1)); b2 = match_bucket(day - last[t2] == 1 and day - last[t1] > 1, np.array(s2))
+        c, q = model.pmf(int(match_key(team_idx[t1], team_idx[t2], match_kind(f"G{g}", day), b1, b2))); codes.append(c); p.append(q)
+    ca, cb = np.repeat(codes[0], len(codes[1])), np.tile(codes[1], len(codes[0])); w = np.repeat(p[0], len(p[1])) * np.tile(p[1], len(p[0]))
+    S1 = np.zeros((len(w), len(sched)), np.int16); S2 = np.zeros_like(S1); RT = np.zeros((len(w), len(sched)), np.int8)
+    S1[:, :k] = [m["s1"] for m in frozen["matches"]]; S2[:, :k] = [m["s2"] for m in frozen["matches"]]; RT[:, :k] = [rt_codes.index(m["rt"]) for m in frozen["matches"]]
+    for i, c in zip([k, k + 1], [ca, cb]): S1[:, i], S2[:, i], RT[:, i] = c // 3 // MAX_GOALS, c // 3 % MAX_GOALS, c % 3
+    ranks, _, B, D, GF = batch_rankings(S1, S2, RT)
+    codes, inv = np.unique(pack(playoff_seeding(ranks, B, D, GF)), return_inverse=True)
+    return codes, np.bincount(inv.ravel(), weights=w)
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_exact_group_stage_matches_joint_enumeration(seed):
+    # Poslední zápas rozpisu v obou skupinách zůstane neodehraný
+    group = [m for m in run_tourney(seed, team_powers_db, {}, 1) if m["stg"].startswith("G")][:-2]
+    db = {(m["t1"], m["t2"], m["stg"]): (m["s1"], m["s2"], m["rt"]) for m in group}
+    assert {g for _, _, _, g in sched[len(group):]} == {"A", "B"}
+    seeding, w, _ = exact_group_stage(team_powers_db, db, 1)
+    codes = pack(seeding); order = np.argsort(codes); joint, joint_w = joint_seedings(db)
+    assert np.array_equal(codes[order], joint) and np.allclose(w[order], joint_w, rtol=1e-9, atol=1e-15)
+    assert np.isclose(w.sum(), 1)
@@ -0,0 +1,44 @@
+# Řešič postupu (group_outlook): se dvěma zbývajícími zápasy proti hrubé síle přes get_iihf_rankings a v různých
+# fázích skupin proti vzorkovaným turnajům (pořadí, které v simulaci padlo, nesmí být vyloučené).
+#   python -m pytest tests
+import itertools
+import random
+import numpy as np
+import pytest
+from engine import batch_group_stage, batch_rankings, get_iihf_rankings, group_outlook, groups_def, results_db, run_tourney, team_idx, team_powers_db
+
+N = 50000   # vzorkovaných turnajů na stav skupin
+# Skóre pro hrubou sílu: rozdíly a góly poraženého malé i "libovolně vysoké" (jako TIE_BIG v řešiči), PP stačí za PP i SN
+MARGINS, LOSER = [1, 2, 3, 4, 5, 30], [0, 1, 2, 3, 30]
+SCORES = [(w + l, l, "REG") for w in MARGINS for l in LOSER] + [(l + 1, l, "PP") for l in LOSER]
+SCORES += [(s2, s1, rt) for s1, s2, rt in SCORES]
+
+def as_db(matches):
+    return {(m["t1"], m["t2"], m["stg"]): (m["s1"], m["s2"], m["rt"]) for m in matches}
+
+def brute_force(gn, played, left):
+    seen = {t: set() for t in groups_def[gn]}
+    for res in itertools.product(SCORES, repeat=len(left)):
+        group = played + [dict(m, s1=s1, s2=s2, rt=rt) for m, (s1, s2, rt) in zip(left, res)]
+        for i, t in enumerate(get_iihf_rankings(groups_def[gn], group)[0]): seen[t].add(i + 1)
+    return {t: sorted(p) for t, p in seen.items()}
+
+@pytest.mark.parametrize("seed", range(1, 13))
+def test_two_games_left_matches_brute_force(seed):
+    # Skupina z jednoho simulovaného turnaje, dva náhodné zápasy se nechají neodehrané
+    gn = "AB"[seed % 2]; group = [m for m in run_tourney(seed, team_powers_db, {}, 1) if m["stg"] == f"G{gn}"]
+    left = random.Random(seed).sample(range(len(group)), 2)
+    played = [m for i, m in enumerate(group) if i not in left]
+    outlook = group_outlook(gn, as_db(played))
+    assert all(o["exact"] for o in outlook.values())
+    assert {t: o["possible"] for t, o in outlook.items()} == brute_force(gn, played, [group[i] for i in left])
+
+@pytest.mark.parametrize("n_played", [None, 8, 36, 44, 50])
+def test_sampled_positions_are_possible(n_played):
+    # None = skutečné výsledky, jinak prvních n_played zápasů rozpisu z jednoho simulovaného turnaje
+    db = results_db if n_played is None else as_db(run_tourney(3, team_powers_db, {}, 1)[:n_played])
+    S1, S2, RT, _ = batch_group_stage(np.arange(1, N + 1), team_powers_db, db, 1)
+    pos = batch_rankings(S1, S2, RT)[1]
+    for gn in groups_def:
+        for t, o in group_outlook(gn, db).items():
+            assert set(np.unique(pos[:, team_idx[t]]).tolist()) <= set(o["possible"]), t
@@ -0,0 +1,76 @@
+# JobQueue: úloha, kterou vlastník (místo na stránce sezení) nahradil jinou a nikdo jiný ji nezobrazuje, se zastaví
+# (rozběhnutá) nebo zruší (ve frontě) a uvolní vlákno; další submit ji spustí znovu. Chyba výpočtu se znovu
+# nespouští, zůstane v Job.error. Každá úloha měří do vlastního profileru (Job.profiler).
+#   python -m pytest tests
+import threading
+import time
+import pytest
+import engine
+from engine import JobCancelled, JobQueue, Profiler, use_profiler
+
+def slow(steps, progress=None):
+    for i in range(steps):
+        time.sleep(0.01)
+        if progress: progress(i + 1, steps)
+    return steps
+
+def broken(progress=None):
+    raise ValueError("chyba ve výpočtu")
+
+def measured(progress=None):
+    engine.profiler.lap("úloha", engine.profiler.start()); engine.profiler.count("kroky", 3)
+    return "ok"
+
+def blocked(gate, progress=None):
+    gate.wait(5)
+    return "ok"
+
+@pytest.fixture
+def queue():
+    q = JobQueue(workers=1)
+    yield q
+    q.pool.shutdown(wait=True, cancel_futures=True)
+
+def test_unpolled_job_finishes(queue):
+    # Na čas ani na překreslování se nehledí: úloha, kterou nikdo nenahradil, doběhne
+    job = queue.submit(slow, 30, owner="a")
+    assert job.future.result(timeout=5) == 30 and job.error() is None
+
+def test_superseded_job_stops_and_restarts(queue):
+    job = queue.submit(slow, 1000, owner="a")
+    queue.submit(slow, 10, owner="a")
+    with pytest.raises(JobCancelled): job.future.result(timeout=5)
+    assert job.stopped() and job.progress[0] < 1000
+    again = queue.submit(slow, 1000, owner="a")
+    assert again is not job and not again.done()
+
+def test_superseded_job_in_queue_is_cancelled(queue):
+    gate = threading.Event()
+    running = queue.submit(blocked, gate, owner="a")
+    waiting = queue.submit(slow, 10, owner="b")
+    queue.submit(slow, 20, owner="b")
+    assert waiting.future.cancelled() and waiting.stopped()
+    gate.set()
+    assert running.result() == "ok"
+
+def test_job_shown_elsewhere_keeps_running(queue):
+    job = queue.submit(slow, 50, owner="a")
+    assert queue.submit(slow, 50, owner="b") is job
+    queue.submit(slow, 10, owner="a")
+    assert job.future.result(timeout=5) == 50
+
+def test_failed_job_is_kept_not_restarted(queue):
+    job = queue.submit(broken)
+    with pytest.raises(ValueError): job.future.result(timeout=5)
+    assert not job.stopped() and isinstance(job.error(), ValueError)
+    assert queue.submit(broken) is job
+
+def test_job_has_its_own_profiler(queue):
+    page = Profiler(); use_profiler(page)
+    try:
+        job = queue.submit(measured); job.result()
+        other = queue.submit(slow, 1); other.result()
+    finally:
+        use_profiler(None)
+    assert job.profiler.calls == {"úloha": 1} and job.profiler.counters == {"kroky": 3}
+    assert not page.calls and not other.profiler.calls
@@ -0,0 +1,19 @@
+# mc_stats s process poolem (workers > 1) musí dát stejný výsledek i počet simulací jako sériový běh,
+# i v adaptivním režimu, kde se dávky počítají dopředu a po dosažení přesnosti zahodí.
+#   python -m pytest tests
+import pandas as pd
+import pytest
+import engine
+from engine import mc_stats, results_db, team_powers_db
+
+@pytest.mark.parametrize("playoffs", ["sample", "exact"])
+def test_workers_match_serial_run(tmp_path, monkeypatch, playoffs):
+    monkeypatch.setattr(engine, "MC_CHUNK", 1000)
+    runs = []
+    for workers in [1, 2]:
+        monkeypatch.setattr(engine, "CACHE_DIR", str(tmp_path / str(workers)))
+        runs.append(mc_stats(2000, team_powers_db, results_db, 1, workers=workers, ci_target=0.02, max_sims=8000, playoffs=playoffs))
+    (serial, serial_stats), (pooled, pooled_stats) = runs
+    assert 2000 < serial.attrs["n_sims"] == pooled.attrs["n_sims"]
+    pd.testing.assert_frame_equal(serial, pooled)
+    assert serial_stats == pooled_stats
@@ -0,0 +1,143 @@
+# OutcomeModel (přesná pmf + alias tabulky) proti původnímu skalárnímu vzorkování z Poissonova modelu:
+# obě sady vzorků se chi-kvadrát testem porovnají s přesnou pmf pro všechny fáze a pro únavu i formu.
+#   python -m pytest tests
+import math
+import numpy as np
+import pytest
+import engine
+from engine import (MAX_GOALS, counter_uniforms, match_bucket, match_key, match_kind, outcome_model, rt_codes,
+                    team_idx, team_powers_db)
+
+N = 3000          # vzorků na případ a sampler
+P_MIN = 0.001     # pod touhle p-hodnotou je rozdělení podezřelé
+STREAKS = {0: -2, 1: 0, 2: 2}   # forma v match_bucket -> série, která ji dá
+
+def sim_match_poisson(t1, t2, match_seed, powers, stage, current_day, last_played_dict, form_streak1=0, form_streak2=0):
+    # Původní skalární vzorkování přímo z Poissonova modelu (před alias tabulkami), jen jako reference
+    curr_rng = np.random.RandomState(match_seed)
+    off1, def1, skill1 = powers[t1]["OFF"], powers[t1]["DEF"], powers[t1]["SKILL"]
+    off2, def2, skill2 = powers[t2]["OFF"], powers[t2]["DEF"], powers[t2]["SKILL"]
+
+    if t1 == "Švýcarsko": off1 *= 1.05; def1 *= 1.05
+    if t2 == "Švýcarsko": off2 *= 1.05; def2 *= 1.05
+
+    rest1 = current_day - last_played_dict.get(t1, -99)
+    rest2 = current_day - last_played_dict.get(t2, -99)
+
+    if rest1 == 1 and rest2 > 1: off1 *= 0.95; def1 *= 0.95
+    elif rest2 == 1 and rest1 > 1: off2 *= 0.95; def2 *= 0.95
+
+    if form_streak1 >= 2: off1 *= 1.04; def1 *= 1.04
+    elif form_streak1 <= -2: off1 *= 0.96; def1 *= 0.96
+    if form_streak2 >= 2: off2 *= 1.04; def2 *= 1.04
+    elif form_streak2 <= -2: off2 *= 0.96; def2 *= 0.96
+
+    if current_day >= 7 and stage.startswith("G"):
+        off1 *= curr_rng.uniform(0.9, 1.1)
+        off2 *= curr_rng.uniform(0.9, 1.1)
+
+    base_avg = 2.4 if stage.startswith("G") else 2.0
+    l1 = base_avg * (off1 / def2)**1.4
+    l2 = base_avg * (off2 / def1)**1.4
+
+    s1 = curr_rng.poisson(l1)
+    s2 = curr_rng.poisson(l2)
+
+    if s1 == s2 + 1:
+        if curr_rng.rand() < 0.25: s1 += 1
+        elif curr_rng.rand() < 0.35: s2 += 1
+    elif s2 == s1 + 1:
+        if curr_rng.rand() < 0.25: s2 += 1
+        elif curr_rng.rand() < 0.35: s1 += 1
+
+    rtype = "REG"
+    if s1 == s2:
+        rtype = "PP" if curr_rng.rand() < 0.65 else "SN"
+        if curr_rng.rand() < (skill1 / (skill1 + skill2)): s1 += 1
+        else: s2 += 1
+
+    return s1, s2, rtype
+
+def chi2_pvalue(observed, expected):
+    # Chi-kvadrát test s binováním na očekávaný počet ≥ 5; p-hodnota přes Wilsonovu–Hilfertyho aproximaci
+    order = np.argsort(-expected); bins = [[0.0, 0.0]]
+    for o, e in zip(observed[order], expected[order]):
+        bins[-1][0] += o; bins[-1][1] += e
+        if bins[-1][1] >= 5: bins.append([0.0, 0.0])
+    if len(bins) > 1: bins[-2][0] += bins[-1][0]; bins[-2][1] += bins[-1][1]; bins.pop()
+    obs, exp = np.array(bins).T
+    x2, k = float(((obs - exp)**2 / exp).sum()), max(len(bins) - 1, 1)
+    z = ((x2 / k)**(1 / 3) - (1 - 2 / (9 * k))) / math.sqrt(2 / (9 * k))
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+# (tým1, tým2, fáze, den, modifikátor1, modifikátor2); modifikátor = únava × 3 + forma (0 = série ≤-2, 1 = jinak, 2 = ≥2)
+CASES = [
+    ("Kanada", "Česko", "GB", 3, 1, 1),           # skupina do 6. dne
+    ("Švýcarsko", "USA", "GA", 8, 1, 1),          # skupina od 7. dne (náhodný útok), domácí
+    ("Lotyšsko", "Švédsko", "PO", 10, 1, 1),      # play-off
+    ("Finsko", "Německo", "GA", 4, 4, 1),         # unavený tým 1
+    ("Česko", "Slovensko", "GB", 8, 1, 4),        # unavený tým 2, od 7. dne
+    ("Kanada", "Švédsko", "GB", 5, 2, 0),         # tým 1 ve formě, tým 2 bez formy
+    ("USA", "Švýcarsko", "PO", 10, 3, 2),         # unavený tým 1 bez formy, domácí ve formě
+    ("Dánsko", "Norsko", "GB", 9, 5, 1),          # unavený tým 1 ve formě, od 7. dne
+]
+
+def legacy_args(t1, t2, day, b1, b2):
+    (tired1, form1), (tired2, form2) = divmod(b1, 3), divmod(b2, 3)
+    last = {t1: day - 1, t2: day - 3} if tired1 else {t1: day - 3, t2: day - 1} if tired2 else {}
+    return last, STREAKS[form1], STREAKS[form2]
+
+def case_pmf(t1, t2, stage, day, b1, b2):
+    last, st1, st2 = legacy_args(t1, t2, day, b1, b2)
+    rest1, rest2 = day - last.get(t1, -99), day - last.get(t2, -99)
+    # Stejné modifikátory, jaké by sim_match spočítal z posledních zápasů a sérií
+    assert (match_bucket(rest1 == 1 and rest2 > 1, st1), match_bucket(rest2 == 1 and rest1 > 1, st2)) == (b1, b2)
+    key = int(match_key(team_idx[t1], team_idx[t2], match_kind(stage, day), b1, b2))
+    codes, p = outcome_model(team_powers_db).pmf(key)
+    return key, codes, p
+
+def counts(codes, sampled):
+    at = {c: i for i, c in enumerate(codes)}; out = np.zeros(len(codes))
+    np.add.at(out, [at[int(c)] for c in sampled], 1)
+    return out
+
+@pytest.mark.parametrize("t1, t2, stage, day, b1, b2", CASES)
+def test_pmf_is_distribution(t1, t2, stage, day, b1, b2):
+    _, codes, p = case_pmf(t1, t2, stage, day, b1, b2)
+    s1, s2, rt = codes // 3 // MAX_GOALS, codes // 3 % MAX_GOALS, codes % 3
+    assert p.sum() == pytest.approx(1.0) and (p > 0).all()
+    assert (s1 != s2).all() and (abs(s1 - s2)[rt > 0] == 1).all()   # bez remíz, PP/SN jen o gól
+
+@pytest.mark.parametrize("t1, t2, stage, day, b1, b2", CASES)
+def test_legacy_sampler_matches_pmf(t1, t2, stage, day, b1, b2):
+    _, codes, p = case_pmf(t1, t2, stage, day, b1, b2)
+    last, st1, st2 = legacy_args(t1, t2, day, b1, b2); sampled = []
+    for i in range(N):
+        s1, s2, rt = sim_match_poisson(t1, t2, 10**7 + i, team_powers_db, stage, day, last, st1, st2)
+        sampled.append((s1 * MAX_GOALS + s2) * 3 + rt_codes.index(rt))
+    assert chi2_pvalue(counts(codes, sampled), N * p) > P_MIN
+
+@pytest.mark.parametrize("t1, t2, stage, day, b1, b2", CASES)
+def test_alias_sampler_matches_pmf(t1, t2, stage, day, b1, b2):
+    key, codes, p = case_pmf(t1, t2, stage, day, b1, b2); model = outcome_model(team_powers_db)
+    s1, s2, rt = model.sample(np.full(N, key), counter_uniforms(10**7 + np.arange(N))[0])
+    assert chi2_pvalue(counts(codes, (s1 * MAX_GOALS + s2) * 3 + rt), N * p) > P_MIN
+    # Skalární cesta sériového enginu dává tytéž výsledky jako dávková
+    u = counter_uniforms(10**7 + np.arange(50))[0]
+    assert [model.sample_one(key, x) for x in u] == list(zip(s1[:50], s2[:50], rt[:50]))
+
+def test_chi2_detects_wrong_modifier():
+    # Kontrola síly testu: vzorky s únavou týmu 1 proti pmf bez únavy musí neprojít
+    _, codes, p = case_pmf("Finsko", "Německo", "GA", 4, 1, 1)
+    last, st1, st2 = legacy_args("Finsko", "Německo", 4, 4, 1); sampled = []
+    for i in range(4 * N):
+        s1, s2, rt = sim_match_poisson("Finsko", "Německo", 10**7 + i, team_powers_db, "GA", 4, last, st1, st2)
+        sampled.append((s1 * MAX_GOALS + s2) * 3 + rt_codes.index(rt))
+    assert chi2_pvalue(counts(codes, sampled), 4 * N * p) < P_MIN
+
+def test_model_cache_is_bounded():
+    # Scénáře se silami týmů (mods=None) i s úpravami modelu: cache modelů nesmí růst se zkoušenými scénáři
+    for i in range(100):
+        outcome_model({t: dict(v, OFF=v["OFF"] + i) for t, v in team_powers_db.items()})
+        outcome_model(team_powers_db, {"host": 1 + i / 100})
+    assert len(engine._models) <= 65 and len(engine._models_by_id) <= 65
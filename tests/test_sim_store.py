@@ -0,0 +1,53 @@
+# Oprava banky simulací po novém výsledku (_store_patch) musí dát bitově stejnou banku i index jako nový běh
+# se stejnými seedy; jinak by se odhady Prediktoru a Hledače lišily podle toho, v jakém pořadí se výsledky zapsaly.
+#   python -m pytest tests
+import numpy as np
+import pytest
+import engine
+from engine import results_db, sched, team_powers_db
+
+N = 4000   # simulací v bance (malá banka, ať test běží rychle)
+
+def played():
+    return [k for d, t1, t2, gn in sched for k in [(t1, t2, f"G{gn}"), (t2, t1, f"G{gn}")] if k in results_db]
+
+def index_bits(index):
+    return ({c: u.tobytes() for c, u in index.universe.items()},
+            {k: {c: (kind, data.tobytes()) for c, (kind, data) in conts.items()} for k, conts in index.bitmaps.items()})
+
+# Nové výsledky podle pořadí v rozpisu: poslední zápas, zápas uprostřed (zamrzlý začátek se nezmění), dva najednou
+# a první zápas, kde se musí znovu zahrát tolik turnajů, že se banka počítá od nuly
+@pytest.mark.parametrize("new, patched_path", [([-1], True), ([-10], True), ([-1, -3], True), ([0], False)])
+def test_patched_store_matches_fresh_run(tmp_path, monkeypatch, new, patched_path):
+    old_db = {k: v for k, v in results_db.items() if k not in [played()[i] for i in new]}
+    monkeypatch.setattr(engine, "CACHE_DIR", str(tmp_path / "patch"))
+    engine.load_outcome_index(N, team_powers_db, old_db, 1)
+    prof = engine.Profiler(); engine.use_profiler(prof)
+    try:
+        patched = np.array(engine.open_sim_store(N, team_powers_db, results_db, 1)).view(np.uint8)
+        patched_index = engine.load_outcome_index(N, team_powers_db, results_db, 1)
+    finally:
+        engine.use_profiler(None)
+    assert ("úložiště: převzaté turnaje" in prof.report()[1]) == patched_path
+    monkeypatch.setattr(engine, "CACHE_DIR", str(tmp_path / "fresh"))
+    fresh = np.array(engine.open_sim_store(N, team_powers_db, results_db, 1)).view(np.uint8)
+    assert np.array_equal(patched, fresh)
+    assert index_bits(patched_index) == index_bits(engine.load_outcome_index(N, team_powers_db, results_db, 1))
+
+def test_parent_must_be_subset(tmp_path, monkeypatch):
+    # Opravený (ne jen přidaný) výsledek: stará banka se nepoužije
+    monkeypatch.setattr(engine, "CACHE_DIR", str(tmp_path))
+    engine.open_sim_store(N, team_powers_db, results_db, 1)
+    k = played()[-1]; s1, s2, rt = results_db[k]
+    changed = dict(results_db); changed[k] = (s1 + 1, s2, rt)
+    assert engine._store_parent(N, team_powers_db, changed, 1) is None
+    smaller = {x: v for x, v in results_db.items() if x != k}
+    engine.open_sim_store(N, team_powers_db, smaller, 1)
+    assert engine._store_parent(N, team_powers_db, results_db, 1) == smaller
+
+def test_store_row_replays_tourney(tmp_path, monkeypatch):
+    # Záložka Simulace čte turnaj z banky: řádek seedu musí dát stejné zápasy jako sériový run_tourney
+    monkeypatch.setattr(engine, "CACHE_DIR", str(tmp_path))
+    store = engine.open_sim_store(N, team_powers_db, results_db, 1)
+    for seed in [1, 2, 777, N]:
+        assert engine.decode_tourney(store, seed - 1) == engine.run_tourney(seed, team_powers_db, results_db, 1)
@@ -0,0 +1,29 @@
+# Co kdyby: whatif_sweep přesně / vzorkovaně a tabulka citlivosti pro st.dataframe.
+#   python -m pytest tests
+import numpy as np
+import engine
+from engine import results_db, run_tourney, team_powers_db, whatif_grid, whatif_sensitivity, whatif_sweep
+
+N = 2000   # simulací na scénář, když se vzorkuje
+
+def late_db():
+    # Skupiny dohrané až na poslední zápas (výsledky z jednoho turnaje): výchozí model jde spočítat přesně
+    group = [m for m in run_tourney(1, team_powers_db, results_db, 1) if m["stg"].startswith("G")]
+    return {(m["t1"], m["t2"], m["stg"]): (m["s1"], m["s2"], m["rt"]) for m in group[:-1]}
+
+def test_sweep_is_exact_late_in_groups():
+    df = whatif_sweep(whatif_grid(("mods", "host"), [1.0, 1.1]), N, late_db(), 1)
+    assert df.attrs["exact"] and df.attrs["n_sims"] == 1
+
+def test_sweep_samples_all_runs_when_a_scenario_is_not_exact(monkeypatch):
+    real = engine.exact_group_stage
+    monkeypatch.setattr(engine, "exact_group_stage", lambda powers, db, version, mods=None: real(powers, db, version, mods=mods) if mods is None else None)
+    df = whatif_sweep(whatif_grid(("mods", "host"), [1.0, 1.1]), N, late_db(), 1)
+    assert not df.attrs["exact"] and df.attrs["n_sims"] == N
+    assert np.isfinite(df.filter(like="Δ").to_numpy()).all()
+
+def test_sensitivity_has_string_columns():
+    df = whatif_sweep(whatif_grid(("Česko", "OFF"), [-10, 0, 10]), N, results_db, 1)
+    sens = whatif_sensitivity(df)
+    assert list(sens.columns) == ["-10", "0", "10", "Sklon"]
+    assert np.allclose(sens["Sklon"], np.polyfit([-10, 0, 10], sens[["-10", "0", "10"]].to_numpy().T, 1)[0])